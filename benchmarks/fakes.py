@@ -0,0 +1,121 @@
+"""Offline stand-ins for yfinance and the CBOE HTTP session
+
+install_fakes() puts a fake ``yfinance`` module in sys.modules and a fake
+session in sentiment_core, both replaying the recorded fixtures. Fixture
+dates are shifted so the last bar falls on the latest business day, and
+tickers without a fixture get a deterministic variation of a recorded one,
+so any number of synthetic markets can be benchmarked.
+"""
+import sys
+import threading
+import time
+import types
+import zlib
+
+import numpy as np
+import pandas as pd
+
+import sentiment_core
+from fixtures import fixture_tickers, load_fixture_history, load_cboe_html
+
+class FixtureSource:
+    """Fixture histories re-dated to end on the latest business day"""
+    
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._histories = {}
+        self._base_tickers = [ticker for ticker in fixture_tickers()
+                              if ticker != sentiment_core.VIX_TICKER and not load_fixture_history(ticker).empty]
+    
+    def _redate(self, hist):
+        end = pd.offsets.BDay().rollback(pd.Timestamp.today().normalize())
+        return hist.set_axis(pd.bdate_range(end=end, periods=len(hist), name='Date'))
+    
+    def _derive(self, ticker):
+        """Deterministic variation of a recorded fixture for a ticker with no fixture of its own"""
+        seed = zlib.crc32(ticker.encode('utf-8'))
+        base = load_fixture_history(self._base_tickers[seed % len(self._base_tickers)])
+        rng = np.random.default_rng(seed)
+        scale = np.exp(np.cumsum(rng.normal(0, 0.004, len(base))))[:, None]
+        prices = base[['Open', 'High', 'Low', 'Close']] * scale
+        volume = base['Volume'] * rng.uniform(0.5, 1.5)
+        return prices.assign(Volume=volume)
+    
+    def history(self, ticker):
+        with self._lock:
+            self.calls += 1
+            hist = self._histories.get(ticker)
+            if hist is None:
+                hist = load_fixture_history(ticker)
+                if hist.empty and self._base_tickers:
+                    hist = self._derive(ticker)
+                hist = self._redate(hist) if not hist.empty else hist
+                self._histories[ticker] = hist
+        if self.latency:
+            time.sleep(self.latency)
+        return hist.copy()
+
+class FakeTicker:
+    """Replays fixture history in place of ``yf.Ticker``"""
+    
+    def __init__(self, ticker, source):
+        self.ticker = ticker
+        self._source = source
+    
+    def history(self, period='1mo', start=None, end=None, auto_adjust=True, timeout=None, **kwargs):
+        hist = self._source.history(self.ticker)
+        if hist.empty:
+            return hist
+        if start is not None:
+            hist = hist[hist.index >= pd.Timestamp(start)]
+        elif period != 'max':
+            hist = hist[hist.index >= sentiment_core._period_start(period)]
+        if end is not None:
+            hist = hist[hist.index < pd.Timestamp(end)]
+        return hist
+
+def make_fake_yfinance(source):
+    """Module object exposing ``Ticker`` and ``download`` backed by ``source``"""
+    module = types.ModuleType('yfinance')
+    module.Ticker = lambda ticker: FakeTicker(ticker, source)
+    
+    def download(tickers, period='1mo', start=None, end=None, **kwargs):
+        names = tickers.split() if isinstance(tickers, str) else list(tickers)
+        frames = {name: FakeTicker(name, source).history(period=period, start=start, end=end) for name in names}
+        if len(names) == 1:
+            return frames[names[0]]
+        return pd.concat(frames, axis=1).swaplevel(0, 1, axis=1).sort_index(axis=1)
+    
+    module.download = download
+    module.__fake__ = True
+    return module
+
+class FakeResponse:
+    def __init__(self, text, status_code=200, headers=None):
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.status_code = status_code
+        self.headers = headers or {}
+
+class FakeSession:
+    """Serves the recorded CBOE page in place of the shared requests session"""
+    
+    def __init__(self, source):
+        self._source = source
+        self._html = load_cboe_html()
+    
+    def get(self, url, headers=None, timeout=None, **kwargs):
+        with self._source._lock:
+            self._source.calls += 1
+        if self._source.latency:
+            time.sleep(self._source.latency)
+        return FakeResponse(self._html)
+
+def install_fakes(latency=0.0):
+    """Route yfinance and CBOE requests to the fixtures; returns the FixtureSource"""
+    source = FixtureSource(latency)
+    sys.modules['yfinance'] = make_fake_yfinance(source)
+    sentiment_core._http_session = FakeSession(source)
+    return source
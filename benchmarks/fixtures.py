@@ -0,0 +1,160 @@
+"""Recorded market fixtures for the offline benchmarks
+
+Fixtures live in benchmarks/fixtures/: one OHLCV CSV per ticker, the CBOE
+market statistics page and a manifest saying whether they were recorded from
+the live sources or synthesized. Record real data once with network access:
+
+    python benchmarks/fixtures.py record --period 2y
+
+Without recorded fixtures, ensure_fixtures() writes a deterministic synthetic
+set so the benchmarks always run offline.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sentiment_core import MARKETS, VIX_TICKER, CBOE_STATS_URL, PRICE_FIELDS
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+OHLCV_DIR = os.path.join(FIXTURE_DIR, 'ohlcv')
+CBOE_FILE = os.path.join(FIXTURE_DIR, 'cboe_market_statistics.html')
+MANIFEST_FILE = os.path.join(FIXTURE_DIR, 'manifest.json')
+
+SYNTHETIC_BARS = 504
+SYNTHETIC_CBOE_HTML = """<html><body><table>
+<tr><td>TOTAL PUT/CALL RATIO</td><td>0.87</td></tr>
+<tr><td>INDEX PUT/CALL RATIO</td><td>1.12</td></tr>
+<tr><td>EQUITY PUT/CALL RATIO</td><td>0.64</td></tr>
+</table></body></html>
+"""
+
+def fixture_tickers():
+    """Every ticker the dashboard fetches"""
+    return [info['ticker'] for info in MARKETS.values()] + [VIX_TICKER]
+
+def _fixture_path(ticker):
+    safe_name = ''.join(c if c.isalnum() or c in '._-' else '_' for c in ticker)
+    return os.path.join(OHLCV_DIR, f"{safe_name}.csv")
+
+def _write_manifest(source, tickers):
+    with open(MANIFEST_FILE, 'w') as f:
+        json.dump({
+            'source': source,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'tickers': tickers
+        }, f, indent=2)
+
+def load_manifest():
+    """Fixture manifest, or None if no fixtures have been written"""
+    try:
+        with open(MANIFEST_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def record_fixtures(period='2y'):
+    """Record OHLCV history for every ticker and the CBOE page from the live sources"""
+    import requests
+    import yfinance as yf
+    
+    os.makedirs(OHLCV_DIR, exist_ok=True)
+    recorded = []
+    for ticker in fixture_tickers():
+        hist = yf.Ticker(ticker).history(period=period, auto_adjust=True)
+        if hist.empty:
+            print(f"warning: no data for {ticker}", file=sys.stderr)
+            continue
+        index = pd.DatetimeIndex(hist.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        hist = hist[PRICE_FIELDS].set_axis(index.normalize().rename('Date'))
+        hist.to_csv(_fixture_path(ticker))
+        recorded.append(ticker)
+    
+    response = requests.get(CBOE_STATS_URL, timeout=30)
+    with open(CBOE_FILE, 'w') as f:
+        f.write(response.text)
+    _write_manifest('recorded', recorded)
+    return recorded
+
+def synthesize_fixtures(bars=SYNTHETIC_BARS, seed=0):
+    """Write deterministic random-walk fixtures for every ticker"""
+    os.makedirs(OHLCV_DIR, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end='2024-12-31', periods=bars, name='Date')
+    
+    tickers = fixture_tickers()
+    for ticker in tickers:
+        if ticker == VIX_TICKER:
+            # Mean-reverting level in the usual VIX range
+            level = np.empty(bars)
+            level[0] = 18.0
+            for i in range(1, bars):
+                level[i] = max(9.0, level[i - 1] + 0.1 * (18.0 - level[i - 1]) + rng.normal(0, 1.2))
+            close = level
+            volume = np.zeros(bars)
+        else:
+            drift, vol = rng.uniform(-0.0003, 0.0006), rng.uniform(0.008, 0.022)
+            close = 100 * np.exp(np.cumsum(rng.normal(drift, vol, bars)))
+            volume = rng.integers(1_000_000, 20_000_000, bars).astype(float)
+        spread = np.abs(rng.normal(0, 0.005, bars))
+        hist = pd.DataFrame({
+            'Open': close * (1 + rng.normal(0, 0.002, bars)),
+            'High': close * (1 + spread),
+            'Low': close * (1 - spread),
+            'Close': close,
+            'Volume': volume
+        }, index=dates)
+        hist.to_csv(_fixture_path(ticker))
+    
+    with open(CBOE_FILE, 'w') as f:
+        f.write(SYNTHETIC_CBOE_HTML)
+    _write_manifest('synthetic', tickers)
+    return tickers
+
+def ensure_fixtures():
+    """Make sure a fixture set exists (synthesizing one if needed); returns the manifest"""
+    manifest = load_manifest()
+    if manifest is None:
+        synthesize_fixtures()
+        manifest = load_manifest()
+    return manifest
+
+def load_fixture_history(ticker):
+    """Recorded OHLCV history for ``ticker``, or an empty DataFrame"""
+    path = _fixture_path(ticker)
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    return pd.read_csv(path, index_col='Date', parse_dates=True)
+
+def load_cboe_html():
+    """Recorded CBOE market statistics page"""
+    with open(CBOE_FILE) as f:
+        return f.read()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record or synthesize benchmark fixtures.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    record = subparsers.add_parser('record', help="Record fixtures from yfinance and CBOE (needs network)")
+    record.add_argument('--period', default='2y', help="History to record per ticker (default: 2y)")
+    synthesize = subparsers.add_parser('synthesize', help="Write deterministic synthetic fixtures")
+    synthesize.add_argument('--bars', type=int, default=SYNTHETIC_BARS)
+    synthesize.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    
+    if args.command == 'record':
+        tickers = record_fixtures(args.period)
+    else:
+        tickers = synthesize_fixtures(args.bars, args.seed)
+    print(f"Wrote fixtures for {len(tickers)} tickers to {FIXTURE_DIR}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""Offline benchmarks for the sentiment pipeline
+
+Replays the fixtures in benchmarks/fixtures/ through fake yfinance and CBOE
+sources, times the main code paths at several market counts and writes the
+results as JSON so runs can be compared between versions.
+
+Examples:
+    python benchmarks/run_benchmarks.py                          # 5, 15 and 300 markets
+    python benchmarks/run_benchmarks.py --sizes 15 --repeats 10 -o before.json
+    python benchmarks/run_benchmarks.py --compare before.json    # run, then compare
+    python benchmarks/run_benchmarks.py --compare before.json after.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, REPO_DIR)
+
+import sentiment_archive
+import sentiment_core as core
+import sentiment_panel
+from fixtures import ensure_fixtures
+from fakes import install_fakes
+
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, 'results')
+DEFAULT_SIZES = [5, 15, 300]
+DEFAULT_REPEATS = 5
+REGRESSION_THRESHOLD = 0.20   # Flag benchmarks whose median got more than 20% slower
+
+def add_synthetic_markets(count):
+    """Extend MARKETS in place to at least ``count`` markets"""
+    for i in range(len(core.MARKETS), count):
+        core.MARKETS[f"Synthetic {i:03d}"] = {
+            'ticker': f"SYN{i:03d}", 'name': f"🧪 Synthetic {i:03d}", 'region': 'Synthetic'
+        }
+
+def reset_state():
+    """Empty price store, HTTP cache, archive, shared panel, macro cache and Streamlit caches"""
+    workdir = tempfile.mkdtemp(prefix='sentiment-bench-')
+    core.PRICE_STORE_DIR = os.path.join(workdir, 'ohlcv')
+    core.HTTP_CACHE_DIR = os.path.join(workdir, 'http')
+    sentiment_archive.ARCHIVE_DIR = os.path.join(workdir, 'archive')
+    sentiment_panel.PANEL_DIR = os.path.join(workdir, 'panel')
+    core._macro_cache.update(snapshot=None, expires_at=0.0)
+    if 'streamlit' in sys.modules:
+        sys.modules['streamlit'].cache_data.clear()
+        sys.modules['streamlit'].cache_resource.clear()
+    return workdir
+
+def time_call(func, repeats, setup=None):
+    """Durations in seconds of ``repeats`` calls to ``func``, running ``setup`` untimed before each"""
+    durations = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+def summarize(name, markets, durations, source, calls_before):
+    return {
+        'benchmark': name,
+        'markets': markets,
+        'repeats': len(durations),
+        'min': round(min(durations), 6),
+        'median': round(statistics.median(durations), 6),
+        'mean': round(statistics.fmean(durations), 6),
+        'max': round(max(durations), 6),
+        'source_calls_per_run': round((source.calls - calls_before) / len(durations), 2)
+    }
+
+def load_app(markets):
+    """Import the Streamlit app in bare mode with the sidebar pinned to ``markets`` and live refresh"""
+    # Silence the warnings Streamlit logs on every call in bare mode
+    for name in ('streamlit.runtime.scriptrunner_utils.script_run_context',
+                 'streamlit.runtime.caching.cache_data_api'):
+        logging.getLogger(name).addFilter(lambda record: record.levelno >= logging.ERROR)
+    import sentiment_analysis_app as app
+    from streamlit import config as streamlit_config
+    streamlit_config.set_option('global.showWarningOnDirectExecution', False)
+    app.st.sidebar.multiselect = lambda *args, **kwargs: list(markets)
+    app.st.sidebar.radio = lambda *args, **kwargs: app.LIVE_SOURCE
+    return app
+
+def benchmark_size(size, repeats, source):
+    """Time every benchmark at ``size`` markets"""
+    add_synthetic_markets(size)
+    markets = list(core.MARKETS)[:size]
+    tickers = [core.MARKETS[market]['ticker'] for market in markets]
+    results = []
+    
+    def record(name, durations, calls_before):
+        results.append(summarize(name, size, durations, source, calls_before))
+        print(f"  {name:<28} median {results[-1]['median'] * 1000:10.2f} ms", file=sys.stderr)
+    
+    workdir = reset_state()
+    try:
+        calls = source.calls
+        started = time.perf_counter()
+        panel = core.load_price_panel(tickers + [core.VIX_TICKER])
+        record('load_price_panel_cold', [time.perf_counter() - started], calls)
+        macro = core.get_macro_snapshot(panel)
+        
+        calls = source.calls
+        record('get_market_data', time_call(
+            lambda: [core.get_market_data(core.MARKETS[m]['ticker'], m, panel, macro) for m in markets],
+            repeats
+        ), calls)
+        
+        market_data = {m: core.get_market_data(core.MARKETS[m]['ticker'], m, panel, macro) for m in markets}
+        calls = source.calls
+        record('calculate_risk_love_score', time_call(
+            lambda: [core.calculate_risk_love_score(data) for data in market_data.values() if data],
+            repeats
+        ), calls)
+        
+        calls = source.calls
+        record('score_market_data', time_call(lambda: core.score_market_data(market_data), repeats), calls)
+        
+        app = load_app(markets)
+        scores = core.score_market_data(market_data)
+        sentiment_data = {m: core.build_sentiment_entry(scores[m], market_data[m]) for m in markets}
+        pyplot = core.lazy_import('matplotlib.pyplot')
+        calls = source.calls
+        record('create_heatmap', time_call(lambda: pyplot.close(app.create_heatmap(sentiment_data)), repeats), calls)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    workdirs = []
+    calls = source.calls
+    record('main_cold', time_call(app.main, repeats, setup=lambda: workdirs.append(reset_state())), calls)
+    calls = source.calls
+    record('main_warm', time_call(app.main, repeats), calls)
+    for workdir in workdirs:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(sizes, repeats, latency):
+    manifest = ensure_fixtures()
+    source = install_fakes(latency)
+    results = []
+    for size in sizes:
+        print(f"{size} markets", file=sys.stderr)
+        results.extend(benchmark_size(size, repeats, source))
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'fixtures': manifest['source'],
+        'latency_seconds': latency,
+        'results': results
+    }
+
+def compare_results(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """Print median changes from ``baseline`` to ``current``; returns the regressed benchmarks"""
+    baseline_medians = {(r['benchmark'], r['markets']): r['median'] for r in baseline['results']}
+    regressions = []
+    print(f"{'benchmark':<28} {'markets':>7} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+    for result in current['results']:
+        key = (result['benchmark'], result['markets'])
+        if key not in baseline_medians:
+            continue
+        before, after = baseline_medians[key], result['median']
+        ratio = after / before if before else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            regressions.append(key)
+            flag = '  REGRESSION'
+        print(f"{key[0]:<28} {key[1]:>7} {before * 1000:>12.2f} {after * 1000:>12.2f} {ratio:>7.2f}{flag}")
+    return regressions
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the offline sentiment benchmarks.")
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES, metavar='N',
+                        help=f"Market counts to benchmark (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS,
+                        help=f"Timed runs per benchmark (default: {DEFAULT_REPEATS})")
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="Simulated seconds per fake network request (default: 0)")
+    parser.add_argument('-o', '--output', help="Results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', nargs='+', metavar='RESULTS',
+                        help="Baseline results to compare against; with two files, compare them without running")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help=f"Relative slowdown reported as a regression (default: {REGRESSION_THRESHOLD})")
+    args = parser.parse_args(argv)
+    
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes a baseline and at most one results file")
+    if args.compare and len(args.compare) == 2:
+        regressions = compare_results(load_results(args.compare[0]), load_results(args.compare[1]), args.threshold)
+        return 1 if regressions else 0
+    
+    warnings.filterwarnings('ignore')
+    report = run_benchmarks(args.sizes, args.repeats, args.latency)
+    
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {output}", file=sys.stderr)
+    
+    if args.compare:
+        regressions = compare_results(load_results(args.compare[0]), report, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
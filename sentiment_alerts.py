@@ -0,0 +1,198 @@
+"""Extreme-signal alerts evaluated on every refreshed snapshot
+
+The engine keeps a per-market zone (BUY, SELL or none) and only alerts on
+transitions: a market enters BUY at a score <= BUY_THRESHOLD and SELL at
+>= SELL_THRESHOLD, and leaves a zone only once the score has moved
+ALERT_HYSTERESIS points back, so a score hovering at 20 or 80 does not
+alert on every refresh. Zones and the last processed snapshot are saved to
+disk and updated under a file lock, so restarts, repeated snapshots and
+several processes watching the same snapshot do not alert twice. Engines
+with different sinks keep separate state (see ``alert_state_path``), so
+each sink configuration gets every alert.
+
+Sinks receive each alert dict:
+    file:PATH       append JSON lines to PATH
+    webhook:URL     POST the alert as JSON
+    log             log at WARNING level
+"""
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime, timezone
+
+from sentiment_core import MARKETS, FETCH_TIMEOUT, get_http_session, fetch_with_retry
+from sentiment_metrics import METRICS
+
+try:
+    import fcntl
+except ImportError:  # Windows: state updates are only serialized within a process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+BUY_THRESHOLD = 20
+SELL_THRESHOLD = 80
+ALERT_HYSTERESIS = 5
+ALERT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'alerts')
+ALERT_STATE_FILE = 'state.json'
+ALERT_LOG_FILE = 'alerts.jsonl'
+
+def next_zone(zone, score, hysteresis=ALERT_HYSTERESIS):
+    """Zone after observing ``score`` in ``zone`` ('BUY', 'SELL' or None)"""
+    if score <= BUY_THRESHOLD:
+        return 'BUY'
+    if score >= SELL_THRESHOLD:
+        return 'SELL'
+    if zone == 'BUY' and score <= BUY_THRESHOLD + hysteresis:
+        return 'BUY'
+    if zone == 'SELL' and score >= SELL_THRESHOLD - hysteresis:
+        return 'SELL'
+    return None
+
+class FileSink:
+    """Append alerts as JSON lines"""
+    
+    def __init__(self, path):
+        self.path = path
+    
+    def send(self, alert):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(alert) + '\n')
+
+class WebhookSink:
+    """POST alerts as JSON to a URL"""
+    
+    def __init__(self, url, timeout=FETCH_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+    
+    def send(self, alert):
+        response = fetch_with_retry(get_http_session().post, self.url, json=alert, timeout=self.timeout)
+        response.raise_for_status()
+
+class QueueSink:
+    """Put alerts on a queue.Queue for in-process consumers"""
+    
+    def __init__(self, alert_queue=None):
+        self.queue = alert_queue if alert_queue is not None else queue.Queue()
+    
+    def send(self, alert):
+        self.queue.put(alert)
+
+class LogSink:
+    def send(self, alert):
+        logger.warning("%s %s %s: score %s", alert['signal'], alert['event'], alert['market'], alert['score'])
+
+def sink_from_spec(spec):
+    """Build a sink from 'file:PATH', 'webhook:URL' or 'log'"""
+    kind, _, target = spec.partition(':')
+    if kind == 'file' and target:
+        return FileSink(target)
+    if kind == 'webhook' and target:
+        return WebhookSink(target)
+    if kind == 'log':
+        return LogSink()
+    raise ValueError(f"unknown alert sink: {spec!r} (expected file:PATH, webhook:URL or log)")
+
+def default_sinks():
+    return [FileSink(os.path.join(ALERT_DIR, ALERT_LOG_FILE))]
+
+def alert_state_path(specs=None):
+    """State file for a sink configuration (``specs`` as given to ``sink_from_spec``; None = default sinks)"""
+    if not specs:
+        return os.path.join(ALERT_DIR, ALERT_STATE_FILE)
+    digest = hashlib.sha1('\n'.join(sorted(specs)).encode()).hexdigest()[:12]
+    return os.path.join(ALERT_DIR, f"state-{digest}.json")
+
+class AlertEngine:
+    """Per-market hysteresis state machine feeding alert sinks"""
+    
+    def __init__(self, sinks=None, state_path=None, hysteresis=ALERT_HYSTERESIS):
+        self.sinks = default_sinks() if sinks is None else list(sinks)
+        self.state_path = state_path or os.path.join(ALERT_DIR, ALERT_STATE_FILE)
+        self.hysteresis = hysteresis
+        self.state = self._load_state()
+        self._lock = threading.Lock()
+    
+    def _load_state(self):
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'last_snapshot': None, 'markets': {}}
+    
+    def _save_state(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
+    
+    def evaluate(self, scores, generated_at=None):
+        """Update zones from a market -> score dict and return the alerts for any transitions"""
+        detected_at = datetime.now(timezone.utc).isoformat()
+        alerts = []
+        for market, score in scores.items():
+            if score is None:
+                continue
+            previous = self.state['markets'].get(market, {'zone': None, 'score': None})
+            zone = next_zone(previous['zone'], score, self.hysteresis)
+            if zone != previous['zone']:
+                for signal, event in ((previous['zone'], 'exit'), (zone, 'enter')):
+                    if signal is None:
+                        continue
+                    alerts.append({
+                        'market': market,
+                        'name': MARKETS.get(market, {}).get('name', market),
+                        'ticker': MARKETS.get(market, {}).get('ticker'),
+                        'signal': signal,
+                        'event': event,
+                        'score': score,
+                        'previous_score': previous['score'],
+                        'generated_at': generated_at,
+                        'detected_at': detected_at
+                    })
+            self.state['markets'][market] = {'zone': zone, 'score': score}
+        return alerts
+    
+    def dispatch(self, alerts):
+        """Send every alert to every sink; a failing sink is logged and does not stop the others"""
+        for alert in alerts:
+            METRICS.increment('alerts_total', signal=alert['signal'], event=alert['event'])
+            for sink in self.sinks:
+                try:
+                    sink.send(alert)
+                except Exception as e:
+                    METRICS.increment('alert_sink_errors_total', sink=type(sink).__name__)
+                    logger.warning(f"Alert sink {type(sink).__name__} failed: {e}")
+    
+    def process_snapshot(self, snapshot):
+        """Evaluate a snapshot unless it (or a newer one) was already processed; returns the alerts sent
+        
+        The state is reloaded under the lock, so every engine sharing the
+        state file sees the zones left by the others.
+        """
+        lock_file = None
+        with self._lock:
+            try:
+                if fcntl is not None:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+                    lock_file = open(f"{self.state_path}.lock", 'w')
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self.state = self._load_state()
+                last_snapshot = self.state.get('last_snapshot')
+                if last_snapshot is not None and snapshot['generated_at'] <= last_snapshot:
+                    return []
+                scores = {market: data['score'] for market, data in snapshot['markets'].items()}
+                alerts = self.evaluate(scores, snapshot['generated_at'])
+                self.dispatch(alerts)
+                self.state['last_snapshot'] = snapshot['generated_at']
+                self._save_state()
+                return alerts
+            finally:
+                if lock_file is not None:
+                    lock_file.close()
@@ -1,13 +1,54 @@
+import time
+
+# Start of this script run, for the startup timing report
+_script_started = time.perf_counter()
+
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-import yfinance as yf
-from datetime import datetime, timedelta
+from datetime import datetime, time as dt_time, timezone
+import io
+import json
+import os
+import logging
 import warnings
-import requests
-from bs4 import BeautifulSoup
+
+from sentiment_core import (
+    MARKETS,
+    COLORS,
+    INDICATOR_CATEGORIES,
+    VIX_TICKER,
+    BACKFILL_PERIOD,
+    PERCENTILE_WINDOW,
+    INTRADAY_INTERVAL,
+    update_price_store,
+    get_macro_snapshot,
+    current_trading_date,
+    load_ticker_indicators,
+    add_macro_inputs,
+    score_market_data,
+    scoring_table_frame,
+    build_sentiment_entry,
+    score_markets_intraday,
+    backfill_risk_love_history,
+    lazy_import,
+    startup_report
+)
+from sentiment_scheduler import (
+    REFRESH_INTERVAL_SECONDS,
+    snapshot_path,
+    load_snapshot,
+    snapshot_age_seconds,
+    snapshot_sentiment_data,
+    start_background_refresh
+)
+from sentiment_alerts import AlertEngine
+from sentiment_archive import get_archive, archive_snapshot, archived_sentiment_data
+from sentiment_metrics import METRICS
+from sentiment_panel import SharedPanel
+
+_imports_finished = time.perf_counter()
 
 warnings.filterwarnings('ignore')
 
@@ -19,320 +60,78 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Market definitions
-MARKETS = {
-    'Global': {'ticker': '^GSPC', 'name': '🌍 Global', 'region': 'Global'},
-    'Japan': {'ticker': '^N225', 'name': '🇯🇵 Japan', 'region': 'Developed Asia'},
-    'Emerging Markets': {'ticker': 'EEM', 'name': '🌏 Emerging Markets', 'region': 'EM'},
-    'Asia ex-Japan': {'ticker': 'AAXJ', 'name': '🏯 Asia ex-Japan', 'region': 'Asia'},
-    'China': {'ticker': 'FXI', 'name': '🇨🇳 China', 'region': 'Asia'},
-    'India': {'ticker': 'INDA', 'name': '🇮🇳 India', 'region': 'Asia'},
-    'Taiwan': {'ticker': 'EWT', 'name': '🇹🇼 Taiwan', 'region': 'Asia'},
-    'Korea': {'ticker': 'EWY', 'name': '🇰🇷 Korea', 'region': 'Asia'},
-    'Hong Kong': {'ticker': 'EWH', 'name': '🇭🇰 Hong Kong', 'region': 'Asia'},
-    'Singapore': {'ticker': 'EWS', 'name': '🇸🇬 Singapore', 'region': 'Asia'},
-    'Indonesia': {'ticker': 'EIDO', 'name': '🇮🇩 Indonesia', 'region': 'EM Asia'},
-    'Brazil': {'ticker': 'EWZ', 'name': '🇧🇷 Brazil', 'region': 'Latin America'},
-    'Mexico': {'ticker': 'EWW', 'name': '🇲🇽 Mexico', 'region': 'Latin America'},
-    'South Africa': {'ticker': 'EZA', 'name': '🇿🇦 South Africa', 'region': 'EMEA'},
-    'Türkiye': {'ticker': 'TUR', 'name': '🇹🇷 Türkiye', 'region': 'EMEA'}
-}
-
-# BofA color scheme
-COLORS = {
-    'panic': '#006837',      # Dark Green (0-20) - Bullish Signal
-    'bearish': '#31a354',    # Medium Green (20-40) 
-    'neutral': '#fed976',    # Gold (40-60) - Neutral
-    'bullish': '#fd8d3c',    # Orange (60-80)
-    'euphoria': '#e31a1c'    # Red (80-100) - Bearish Signal
-}
-
-# BofA 35-indicator categories
-INDICATOR_CATEGORIES = {
-    'Positioning': {
-        'weight': 0.20,
-        'description': 'Fund flows, positioning, exposure levels',
-        'count': 6
-    },
-    'Put/Call Ratios': {
-        'weight': 0.25, 
-        'description': 'Options sentiment and fear gauges',
-        'count': 6
-    },
-    'Surveys': {
-        'weight': 0.30,
-        'description': 'Professional and retail sentiment surveys', 
-        'count': 7
-    },
-    'Technicals': {
-        'weight': 0.15,
-        'description': 'Technical market indicators',
-        'count': 3
-    },
-    'Volatility/Spreads': {
-        'weight': 0.10,
-        'description': 'Volatility indices, spreads, correlations',
-        'count': 13
-    }
-}
+# Streamlit cache settings for per-ticker results
+MARKET_CACHE_TTL_SECONDS = 900
+MARKET_CACHE_MAX_ENTRIES = 500
 
-def get_cboe_put_call_ratio():
-    """Get CBOE put/call ratio from CBOE website"""
-    try:
-        # Use CBOE's website data
-        url = "https://www.cboe.com/us/options/market_statistics/"
-        response = requests.get(url)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # If we can't get live data, use simulated data based on historical ranges
-        # CBOE P/C ratio typically ranges from 0.5 (bullish) to 1.2 (bearish)
-        # We'll simulate a value between 0.5 and 1.2
-        import random
-        pc_ratio = random.uniform(0.5, 1.2)
-        
-        return pc_ratio
-    except Exception as e:
-        st.warning(f"Could not fetch CBOE put/call ratio: {e}")
-        return 0.85  # Return neutral value if fetch fails
+# Heatmap rendering: cached PNGs for normal selections, a native chart for long lists
+HEATMAP_CACHE_MAX_ENTRIES = 64
+HEATMAP_DPI = 100
+HEATMAP_NATIVE_THRESHOLD = 40
 
-def get_vix_data():
-    """Get VIX index data from Yahoo Finance"""
-    try:
-        # Fetch VIX data from Yahoo Finance
-        vix_data = yf.download('^VIX', period='1d')
-        if not vix_data.empty:
-            vix_value = float(vix_data['Close'].iloc[-1])  # Convert to float
-        else:
-            # If data fetch fails, use simulated data
-            import random
-            vix_value = random.uniform(12, 35)  # Typical VIX range
-            
-        return vix_value
-    except Exception as e:
-        st.warning(f"Could not fetch VIX data: {e}")
-        return 20.0  # Return neutral value as float
+# Data source options
+SNAPSHOT_SOURCE = "📦 Shared snapshot"
+LIVE_SOURCE = "🔄 Live refresh"
+INTRADAY_SOURCE = "⚡ Intraday live"
+ARCHIVE_SOURCE = "🗄️ Archive (as of)"
 
-def get_market_data(ticker, market_name):
-    """Get live market data"""
-    try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="6mo")
-        
-        if hist.empty:
-            return None
-            
-        current_price = hist['Close'].iloc[-1]
-        
-        # Calculate sentiment components
-        returns = hist['Close'].pct_change().dropna()
-        volatility = returns.std() * np.sqrt(252) * 100
-        
-        # 20-day momentum
-        ma20 = hist['Close'].rolling(20).mean().iloc[-1] if len(hist) >= 20 else current_price
-        momentum_20d = ((current_price / ma20) - 1) * 100
-        
-        # 60-day momentum  
-        ma60 = hist['Close'].rolling(60).mean().iloc[-1] if len(hist) >= 60 else current_price
-        momentum_60d = ((current_price / ma60) - 1) * 100
-        
-        # Volume analysis
-        avg_volume = hist['Volume'].rolling(20).mean().iloc[-1]
-        recent_volume = hist['Volume'].iloc[-5:].mean()
-        volume_trend = (recent_volume / avg_volume - 1) * 100 if avg_volume > 0 else 0
-        
-        # Performance metrics - Calculate actual returns, not annualized
-        # 1-month performance (21 trading days)
-        if len(hist) >= 21:
-            start_price_1m = hist['Close'].iloc[-21]
-            perf_1m = ((current_price / start_price_1m) - 1) * 100
-        else:
-            perf_1m = 0
-            
-        # 3-month performance (63 trading days)
-        if len(hist) >= 63:
-            start_price_3m = hist['Close'].iloc[-63]
-            perf_3m = ((current_price / start_price_3m) - 1) * 100
-        else:
-            perf_3m = 0
-            
-        # Add put/call ratio for major markets
-        if market_name in ['Global', 'Japan', 'Emerging Markets']:
-            pc_ratio = get_cboe_put_call_ratio()
-        else:
-            pc_ratio = None
-            
-        # Add VIX data for all markets (global sentiment indicator)
-        vix_value = get_vix_data()
-        
-        return {
-            'momentum_20d': momentum_20d,
-            'momentum_60d': momentum_60d,
-            'volatility': volatility,
-            'volume_trend': volume_trend,
-            'perf_1m': perf_1m,
-            'perf_3m': perf_3m,
-            'current_price': current_price,
-            'put_call_ratio': pc_ratio,
-            'vix': vix_value
-        }
-        
-    except Exception as e:
-        st.error(f"Error fetching data for {market_name}: {str(e)}")
-        return None
+# Intraday live mode polling
+LIVE_POLL_SECONDS = 60
+LIVE_POLL_RANGE = (15, 600)
+INTRADAY_STATE_KEY = 'intraday'
 
-def calculate_risk_love_score(market_data):
-    """Calculate BofA-style Risk-Love percentile score using contrarian methodology"""
-    if not market_data:
-        return 50
-        
-    # Extract indicators
-    momentum_20d = market_data.get('momentum_20d', 0)
-    momentum_60d = market_data.get('momentum_60d', 0)
-    volatility = market_data.get('volatility', 15)
-    volume_trend = market_data.get('volume_trend', 0)
-    perf_1m = market_data.get('perf_1m', 0)
-    perf_3m = market_data.get('perf_3m', 0)
-    put_call_ratio = market_data.get('put_call_ratio', None)
-    
-    # Handle VIX data - ensure it's a single float value
-    vix_value = None
-    if 'vix' in market_data and market_data['vix'] is not None:
-        try:
-            vix_value = float(market_data['vix'])
-        except (ValueError, TypeError):
-            vix_value = None
-    
-    # BofA contrarian scoring methodology
-    # High momentum + low volatility = high sentiment = bearish signal (high percentile)
-    
-    # Momentum component (contrarian - strong momentum = high sentiment = bearish)
-    if momentum_60d > 20:
-        momentum_score = 90  # Very bullish market = bearish signal
-    elif momentum_60d > 10:
-        momentum_score = 75
-    elif momentum_60d > -5:
-        momentum_score = 55
-    elif momentum_60d > -15:
-        momentum_score = 30
-    else:
-        momentum_score = 10  # Very bearish market = bullish signal
-        
-    # Volatility component (contrarian - low vol = complacency = high sentiment)
-    if volatility < 8:
-        vol_score = 85  # Low vol = complacency = bearish
-    elif volatility < 15:
-        vol_score = 65
-    elif volatility < 25:
-        vol_score = 50
-    elif volatility < 35:
-        vol_score = 25
-    else:
-        vol_score = 10  # High vol = fear = bullish
-        
-    # Performance component (recent gains = bullish sentiment = bearish signal)
-    avg_perf = (perf_1m + perf_3m) / 2
-    if avg_perf > 25:
-        perf_score = 90  # Strong gains = euphoria
-    elif avg_perf > 10:
-        perf_score = 70
-    elif avg_perf > -5:
-        perf_score = 50
-    elif avg_perf > -20:
-        perf_score = 25
-    else:
-        perf_score = 10  # Heavy losses = panic
-        
-    # Volume component (high volume + gains = euphoria)
-    if volume_trend > 50 and perf_1m > 5:
-        volume_score = 80  # High volume + gains = euphoria
-    elif volume_trend > 20:
-        volume_score = 65
-    elif volume_trend > -20:
-        volume_score = 50
-    else:
-        volume_score = 35
-        
-    # Put/Call ratio component (contrarian - high put/call = bearish = bullish signal)
-    if put_call_ratio:
-        if put_call_ratio > 1.0:
-            pc_score = 20  # High put/call = fear = bullish signal
-        elif put_call_ratio > 0.8:
-            pc_score = 40
-        elif put_call_ratio > 0.6:
-            pc_score = 60
-        else:
-            pc_score = 80  # Low put/call = greed = bearish signal
-    else:
-        pc_score = 50  # Neutral if no data
-        
-    # VIX component (contrarian - high VIX = fear = bullish signal)
-    if vix_value is not None:
-        if vix_value > 30:
-            vix_score = 15  # High VIX = fear = bullish signal
-        elif vix_value > 25:
-            vix_score = 30
-        elif vix_value > 20:
-            vix_score = 50
-        elif vix_value > 15:
-            vix_score = 70
+# Summary table and detail panels: only the current page is sent to the browser
+SUMMARY_PAGE_SIZE = 25
+DETAIL_PAGE_SIZE = 10
+ZONE_FILTERS = ["All", "Extreme", "🟢 BUY zone", "🔴 SELL zone", "Neutral"]
+UNSORTED = "Selection order"
+
+class StreamlitLogHandler(logging.Handler):
+    """Show warnings and errors logged by the scoring core on the page"""
+    
+    def emit(self, record):
+        # Records from background threads (e.g. the snapshot worker) have no page to go to
+        if get_script_run_ctx() is None:
+            return
+        message = self.format(record)
+        if record.levelno >= logging.ERROR:
+            st.error(message)
         else:
-            vix_score = 85  # Low VIX = complacency = bearish signal
-    else:
-        vix_score = 50  # Neutral if no data
-        
-    # Weighted composite (BofA methodology weights with VIX added)
-    composite = (
-        momentum_score * 0.20 +    # Reduced from 0.25
-        vol_score * 0.15 +         # Reduced from 0.20
-        perf_score * 0.15 +        # Reduced from 0.20
-        volume_score * 0.15 +      # Same as before
-        pc_score * 0.15 +          # Reduced from 0.20
-        vix_score * 0.20           # New VIX component
-    )
+            st.warning(message)
+
+@st.cache_resource
+def install_log_handler():
+    """Route sentiment_core log records to the page once per process"""
+    handler = StreamlitLogHandler(level=logging.WARNING)
+    logging.getLogger('sentiment_core').addHandler(handler)
+    return handler
+
+@st.cache_resource
+def startup_timings():
+    """Import and first-render seconds of the first script run in this process"""
+    return {}
+
+@st.cache_data(ttl=MARKET_CACHE_TTL_SECONDS, max_entries=MARKET_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_ticker_indicators(ticker, trading_date):
+    """Indicators for one ticker, cached per ticker and trading date
     
-    return max(0, min(100, round(composite)))
-
-def get_sentiment_color(score):
-    """Get BofA color for sentiment score"""
-    if score <= 20:
-        return COLORS['panic']
-    elif score <= 40:
-        return COLORS['bearish']
-    elif score <= 60:
-        return COLORS['neutral']
-    elif score <= 80:
-        return COLORS['bullish']
-    else:
-        return COLORS['euphoria']
-
-def get_sentiment_interpretation(score):
-    """Get BofA interpretation and emoji"""
-    if score <= 20:
-        return "Panic (Bullish Signal)", "🟢"
-    elif score <= 40:
-        return "Bearish Sentiment", "🟡"
-    elif score <= 60:
-        return "Neutral Territory", "⚪"
-    elif score <= 80:
-        return "Bullish Sentiment", "🟠"
-    else:
-        return "Euphoria (Bearish Signal)", "🔴"
-
-def get_trading_signal(score):
-    """Get contrarian trading signal"""
-    if score <= 20:
-        return "🟢 STRONG BUY", "Panic conditions = Maximum opportunity"
-    elif score <= 40:
-        return "🟡 BUY", "Bearish sentiment = Good entry point"
-    elif score <= 60:
-        return "⚪ NEUTRAL", "Mixed signals = Wait for extremes"
-    elif score <= 80:
-        return "🟠 CAUTION", "Bullish sentiment = Reduce risk"
-    else:
-        return "🔴 STRONG SELL", "Euphoria conditions = Maximum risk"
+    Shared by every session, so reruns and newly added markets only compute
+    what is not cached yet. Errors are not cached.
+    """
+    METRICS.increment('cache_misses_total', cache='ticker_indicators')
+    return load_ticker_indicators(ticker)
+
+@st.cache_data(ttl=MARKET_CACHE_TTL_SECONDS, max_entries=32, show_spinner=False)
+def load_percentile_history(markets, trading_date):
+    """Rolling percentile history for a tuple of markets, cached per trading date"""
+    _, _, percentiles = backfill_risk_love_history(list(markets))
+    return percentiles
 
 def create_heatmap(sentiment_data):
     """Create BofA-style heatmap"""
+    plt = lazy_import('matplotlib.pyplot')
+    mpatches = lazy_import('matplotlib.patches')
+    
     fig, ax = plt.subplots(figsize=(12, len(sentiment_data) * 0.6))
     
     markets = list(sentiment_data.keys())
@@ -374,7 +173,455 @@ def create_heatmap(sentiment_data):
     
     return fig
 
+@st.cache_resource
+def get_shared_panel():
+    """Process-wide read-only mapping of the shared price panel"""
+    return SharedPanel()
+
+@st.cache_resource
+def get_background_refresh():
+    """Start one snapshot refresh worker per process, shared by every session
+    
+    The worker also evaluates extreme-signal alerts with the default sinks,
+    so they keep flowing whichever process holds the snapshot writer lock.
+    """
+    return start_background_refresh(REFRESH_INTERVAL_SECONDS, alert_engine=AlertEngine())
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_cached_snapshot(path, modified_at):
+    """Latest snapshot, re-read only when the file's modification time changes"""
+    return load_snapshot(path)
+
+def read_latest_snapshot():
+    """Latest shared snapshot, or None if the worker has not produced one yet"""
+    path = snapshot_path()
+    try:
+        modified_at = os.path.getmtime(path)
+    except OSError:
+        return None
+    return load_cached_snapshot(path, modified_at)
+
+def format_age(seconds):
+    """Human-readable snapshot age"""
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f} h"
+
+def compute_live_sentiment(selected_markets):
+    """Fetch and score the selected markets in this session, with a progress bar"""
+    # Progress bar
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    
+    # Get sentiment data
+    sentiment_data = {}
+    
+    # Use the shared panel when it is fresh; otherwise update the local store
+    # for every selected ticker (plus VIX). Only tickers that are new or were
+    # not checked recently hit the network.
+    tickers = [MARKETS[market]['ticker'] for market in selected_markets]
+    shared_panel = get_shared_panel()
+    if shared_panel.covers(tickers + [VIX_TICKER]):
+        # Indicators straight from the memory-mapped panel the snapshot worker publishes
+        status_text.text('Reading shared price panel...')
+        macro = get_macro_snapshot(shared_panel.price_frame([VIX_TICKER]))
+        indicators = shared_panel.indicators(tickers)
+        market_data_by_market = {
+            market: add_macro_inputs(indicators.loc[ticker].to_dict(), market, macro)
+            if pd.notna(indicators.at[ticker, 'current_price']) else None
+            for market, ticker in zip(selected_markets, tickers)
+        }
+        progress_bar.progress(1.0)
+    else:
+        market_data_by_market = load_market_data(selected_markets, tickers, progress_bar, status_text)
+    
+    # Score every market in one vectorized pass
+    scores = score_market_data(market_data_by_market)
+    for market, market_data in market_data_by_market.items():
+        sentiment_data[market] = build_sentiment_entry(scores[market], market_data)
+    
+    # Clear progress indicators
+    status_text.empty()
+    progress_bar.empty()
+    
+    return sentiment_data
+
+def load_market_data(selected_markets, tickers, progress_bar, status_text):
+    """Per-market indicators from the local store (updated first) and the per-ticker cache"""
+    status_text.text('Fetching market data...')
+    total_markets = len(selected_markets)
+    try:
+        update_price_store(tickers + [VIX_TICKER])
+    except Exception as e:
+        st.warning(f"Could not update local price store, using stored history: {e}")
+    macro = get_macro_snapshot()
+    trading_date = current_trading_date()
+    
+    market_data_by_market = {}
+    for i, market in enumerate(selected_markets):
+        status_text.text(f'Analyzing {market}...')
+        progress_bar.progress((i + 1) / total_markets)
+        
+        market_info = MARKETS[market]
+        try:
+            METRICS.increment('cache_requests_total', cache='ticker_indicators')
+            indicators = cached_ticker_indicators(market_info['ticker'], trading_date)
+            market_data_by_market[market] = add_macro_inputs(indicators, market, macro)
+        except Exception as e:
+            st.error(f"Error fetching data for {market}: {str(e)}")
+            market_data_by_market[market] = None
+    return market_data_by_market
+
+@st.cache_data(max_entries=HEATMAP_CACHE_MAX_ENTRIES, show_spinner=False)
+def render_heatmap_png(markets, scores, colors):
+    """Render the matplotlib heatmap to PNG bytes
+    
+    Cached by the (markets, scores, colours) tuples, so reruns with unchanged
+    scores reuse the rasterized image instead of rebuilding the figure.
+    """
+    sentiment_data = {
+        market: {'score': score, 'color': color}
+        for market, score, color in zip(markets, scores, colors)
+    }
+    METRICS.increment('cache_misses_total', cache='heatmap_png')
+    with METRICS.timer('heatmap_render'):
+        fig = create_heatmap(sentiment_data)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=HEATMAP_DPI, bbox_inches='tight')
+        lazy_import('matplotlib.pyplot').close(fig)
+    return buffer.getvalue()
+
+def heatmap_chart_spec(sentiment_data):
+    """Vega-Lite version of the heatmap, drawn by the browser for long market lists"""
+    values = [
+        {'market': MARKETS[market]['name'], 'score': data['score'], 'color': data['color']}
+        for market, data in sentiment_data.items()
+    ]
+    thresholds = [
+        {'score': 20, 'color': 'green'},
+        {'score': 80, 'color': 'red'}
+    ]
+    return {
+        'title': 'BofA Risk-Love Sentiment Analysis',
+        'height': max(200, 18 * len(values)),
+        'layer': [
+            {
+                'data': {'values': values},
+                'mark': {'type': 'bar', 'opacity': 0.8},
+                'encoding': {
+                    'y': {'field': 'market', 'type': 'nominal', 'sort': None, 'title': None},
+                    'x': {
+                        'field': 'score', 'type': 'quantitative',
+                        'scale': {'domain': [0, 100]}, 'title': 'Risk-Love Percentile'
+                    },
+                    'color': {'field': 'color', 'type': 'nominal', 'scale': None},
+                    'tooltip': [
+                        {'field': 'market', 'type': 'nominal'},
+                        {'field': 'score', 'type': 'quantitative'}
+                    ]
+                }
+            },
+            {
+                'data': {'values': thresholds},
+                'mark': {'type': 'rule', 'strokeDash': [6, 4], 'opacity': 0.5, 'size': 2},
+                'encoding': {
+                    'x': {'field': 'score', 'type': 'quantitative'},
+                    'color': {'field': 'color', 'type': 'nominal', 'scale': None}
+                }
+            }
+        ]
+    }
+
+def show_heatmap(sentiment_data):
+    """Draw the heatmap with the cheapest suitable render path"""
+    if len(sentiment_data) > HEATMAP_NATIVE_THRESHOLD:
+        st.vega_lite_chart(spec=heatmap_chart_spec(sentiment_data), width='stretch')
+        return
+    
+    markets = tuple(sentiment_data)
+    METRICS.increment('cache_requests_total', cache='heatmap_png')
+    png = render_heatmap_png(
+        markets,
+        tuple(sentiment_data[market]['score'] for market in markets),
+        tuple(sentiment_data[market]['color'] for market in markets)
+    )
+    st.image(png, width='stretch')
+
+def show_results(sentiment_data, previous_scores=None):
+    """Heatmap, extreme signals and summary table
+    
+    ``previous_scores`` (market -> score from the last intraday poll) adds a
+    Change column to the summary table.
+    """
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        st.subheader("🎯 Risk-Love Sentiment Heatmap")
+        
+        # Create and display heatmap
+        show_heatmap(sentiment_data)
+    
+    with col2:
+        st.subheader("🚨 Trading Signals")
+        
+        # Extreme alerts
+        extreme_signals = []
+        for market, data in sentiment_data.items():
+            score = data['score']
+            if is_extreme(score):
+                signal_type = "🟢 BUY" if score <= 20 else "🔴 SELL"
+                extreme_signals.append((market, score, signal_type))
+        
+        if extreme_signals:
+            st.markdown("**⚡ EXTREME SIGNALS:**")
+            for market, score, signal in extreme_signals:
+                st.markdown(f"{signal} **{market}** ({score}th percentile)")
+            st.markdown("---")
+        
+        # Global sentiment summary
+        if 'Global' in sentiment_data:
+            global_score = sentiment_data['Global']['score']
+            global_interp, global_icon = sentiment_data['Global']['interpretation']
+            st.markdown(f"**🌍 GLOBAL SENTIMENT**")
+            st.markdown(f"{global_icon} {global_score}th percentile")
+            st.markdown(f"*{global_interp}*")
+            st.markdown("---")
+        
+        # Summary table
+        st.subheader("📋 Summary Table")
+        show_summary_table(sentiment_data, previous_scores)
+
+def summary_frame(sentiment_data, previous_scores=None):
+    """One summary row per market, in selection order"""
+    markets = list(sentiment_data)
+    df = pd.DataFrame({
+        'Market': [MARKETS[market]['name'] for market in markets],
+        'Score': [sentiment_data[market]['score'] for market in markets],
+        'Signal': [sentiment_data[market]['signal'][0] for market in markets],
+        'Status': [sentiment_data[market]['interpretation'][1] for market in markets]
+    })
+    if previous_scores is not None:
+        df['Change'] = [sentiment_data[market]['score'] - previous_scores.get(market, sentiment_data[market]['score'])
+                        for market in markets]
+    return df
+
+def filter_summary(df, query="", zone="All", sort_by=UNSORTED, descending=False):
+    """Rows of a summary frame matching a name filter and score zone, sorted"""
+    if query:
+        df = df[df['Market'].str.contains(query, case=False, regex=False)]
+    if zone == "Extreme":
+        df = df[(df['Score'] <= 20) | (df['Score'] >= 80)]
+    elif zone == "🟢 BUY zone":
+        df = df[df['Score'] <= 20]
+    elif zone == "🔴 SELL zone":
+        df = df[df['Score'] >= 80]
+    elif zone == "Neutral":
+        df = df[(df['Score'] > 20) & (df['Score'] < 80)]
+    if sort_by != UNSORTED:
+        df = df.sort_values(sort_by, ascending=not descending, kind='stable')
+    return df
+
+def page_bounds(total, page_size, key):
+    """Page picker (shown only when there is more than one page); returns the (start, stop) rows"""
+    pages = max(1, -(-total // page_size))
+    page = 1
+    if pages > 1:
+        # The page count is part of the key, so a shorter list starts again at page 1
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=f"{key}_{pages}")
+    start = (page - 1) * page_size
+    return start, min(start + page_size, total)
+
+@st.fragment
+def show_summary_table(sentiment_data, previous_scores=None):
+    """Summary table filtered, sorted and paged on the server
+    
+    A fragment, so changing the filters reruns only the table, and only
+    the current page of rows is sent to the browser.
+    """
+    df = summary_frame(sentiment_data, previous_scores)
+    with st.popover("🔎 Filter & sort"):
+        query = st.text_input("Market name contains", key='summary_query')
+        zone = st.selectbox("Zone", ZONE_FILTERS, key='summary_zone')
+        sort_by = st.selectbox("Sort by", [UNSORTED] + list(df.columns), key='summary_sort')
+        descending = st.toggle("Descending", key='summary_descending')
+    
+    df = filter_summary(df, query, zone, sort_by, descending)
+    start, stop = page_bounds(len(df), SUMMARY_PAGE_SIZE, 'summary_page')
+    st.dataframe(df.iloc[start:stop], hide_index=True, width='stretch')
+    if len(df) > SUMMARY_PAGE_SIZE or len(df) < len(sentiment_data):
+        st.caption(f"Rows {start + 1 if len(df) else 0}–{stop} of {len(df)} ({len(sentiment_data)} markets)")
+
+def is_extreme(score):
+    """Whether a score is in the extreme BUY/SELL zones"""
+    return score <= 20 or score >= 80
+
+def live_results(selected_markets):
+    """Poll today's intraday bars and redraw the results section
+    
+    Run as a fragment with ``run_every``, so each poll reruns only this
+    section. Indicators are updated incrementally; the heatmap image is reused
+    from cache while scores are unchanged, and markets crossing into or out of
+    the extreme zones raise a toast. The detail panels are drawn here too, so
+    their metrics follow each poll.
+    """
+    state = st.session_state.setdefault(INTRADAY_STATE_KEY, {'scores': None, 'data': {}})
+    try:
+        sentiment_data = score_markets_intraday(selected_markets)
+    except Exception as e:
+        if not state['data']:
+            st.warning(f"Intraday refresh failed and there is no earlier poll to show; retrying in the background: {e}")
+            return
+        st.warning(f"Intraday refresh failed, showing the last poll: {e}")
+        sentiment_data = state['data']
+    
+    previous_scores = state['scores']
+    scores = {market: data['score'] for market, data in sentiment_data.items()}
+    changed = []
+    if previous_scores is not None:
+        changed = [market for market, score in scores.items() if previous_scores.get(market) != score]
+        for market in changed:
+            if market in previous_scores and is_extreme(scores[market]) != is_extreme(previous_scores[market]):
+                direction = "entered" if is_extreme(scores[market]) else "left"
+                st.toast(f"⚡ {MARKETS[market]['name']} {direction} the extreme zone ({scores[market]}th percentile)")
+    
+    st.caption(
+        f"⚡ Intraday {INTRADAY_INTERVAL} bars, polled at {datetime.now().strftime('%H:%M:%S')}; "
+        f"{len(changed)} score(s) changed"
+    )
+    show_results(sentiment_data, previous_scores or scores)
+    archive_snapshot(sentiment_data, datetime.now(timezone.utc), source='intraday')
+    state['scores'] = scores
+    state['data'] = sentiment_data
+    
+    st.header("📈 Detailed Market Analysis")
+    show_market_details(sentiment_data)
+
+def show_market_detail(market, data):
+    """Score, interpretation, signal and indicator metrics for one market"""
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric(
+            "Risk-Love Score", 
+            f"{data['score']}th percentile"
+        )
+    
+    with col2:
+        st.markdown(f"**Interpretation:**")
+        st.markdown(f"{data['interpretation'][1]} {data['interpretation'][0]}")
+    
+    with col3:
+        st.markdown(f"**Trading Signal:**")
+        st.markdown(f"{data['signal'][0]}")
+        st.markdown(f"*{data['signal'][1]}*")
+    
+    # Raw data if available
+    if data['raw_data']:
+        st.markdown("**Technical Indicators:**")
+        raw_data = data['raw_data']
+        
+        # First row of metrics
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric("20D Momentum", f"{raw_data.get('momentum_20d', 0):.1f}%")
+        
+        with col2:
+            st.metric("Volatility", f"{raw_data.get('volatility', 0):.1f}%")
+        
+        with col3:
+            st.metric("1M Performance", f"{raw_data.get('perf_1m', 0):.1f}%")
+        
+        with col4:
+            st.metric("3M Performance", f"{raw_data.get('perf_3m', 0):.1f}%")
+        
+        # Second row for VIX and Put/Call if available
+        if raw_data.get('vix') is not None or raw_data.get('put_call_ratio') is not None:
+            st.markdown("**Sentiment Indicators:**")
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                if raw_data.get('vix') is not None:
+                    st.metric("VIX Index", f"{raw_data.get('vix', 0):.1f}")
+            
+            with col2:
+                if raw_data.get('put_call_ratio') is not None:
+                    st.metric("Put/Call Ratio", f"{raw_data.get('put_call_ratio', 0):.2f}")
+
+@st.fragment
+def show_market_details(sentiment_data):
+    """Detail panel for one market at a time, picked from a paged list
+    
+    Only the chosen market's widgets are built, so the page payload does not
+    grow with the selection; picking another market reruns just this fragment.
+    """
+    markets = list(sentiment_data)
+    start, stop = page_bounds(len(markets), DETAIL_PAGE_SIZE, 'detail_page')
+    market = st.radio(
+        "Market",
+        markets[start:stop],
+        format_func=lambda market: f"{MARKETS[market]['name']} ({sentiment_data[market]['score']})",
+        horizontal=True,
+        key=f'detail_market_{start}'
+    )
+    st.subheader(f"📊 {MARKETS[market]['name']} - {sentiment_data[market]['score']}th percentile")
+    show_market_detail(market, sentiment_data[market])
+
+def show_archive_changes(start, end, selected_markets):
+    """Score and component changes between the archived snapshots as of two times"""
+    st.header("🔀 Changes Since Comparison Date")
+    changes = get_archive().diff(start, end, selected_markets)
+    if changes.empty:
+        st.info(f"Nothing was archived at or before {start.strftime('%Y-%m-%d')} for comparison.")
+        return
+    table = changes['change'].rename(columns=lambda column: (
+        f"Δ {column.removeprefix('component:')} score" if column.startswith('component:') else f"Δ {column}"
+    ))
+    table.insert(0, 'Score', changes[('to', 'score')].astype(int))
+    table.index = [MARKETS[market]['name'] for market in table.index]
+    st.dataframe(table.round(2), width='stretch')
+
+def show_diagnostics():
+    """Stage timings, cache hit rates, fallbacks and bytes fetched since the process started"""
+    stages = pd.DataFrame(METRICS.stage_summary())
+    if not stages.empty:
+        st.markdown("**Stage timings**")
+        stages['mean_ms'] = stages['mean_seconds'] * 1000
+        stages['max_ms'] = stages['max_seconds'] * 1000
+        st.dataframe(
+            stages[['stage', 'runs', 'total_seconds', 'mean_ms', 'max_ms']].round(2),
+            hide_index=True, width='stretch'
+        )
+    
+    lookups = METRICS.counter_totals('cache_requests_total', by='cache')
+    misses = METRICS.counter_totals('cache_misses_total', by='cache')
+    if lookups:
+        st.markdown("**Cache hit rates**")
+        st.dataframe(pd.DataFrame([
+            {'cache': cache, 'requests': count, 'hit_rate': 1 - misses.get(cache, 0) / count}
+            for cache, count in lookups.items()
+        ]).round(3), hide_index=True, width='stretch')
+    
+    fallbacks = METRICS.counter_totals('fallbacks_total', by='source')
+    st.markdown("**Fallback values used**: " + (
+        ", ".join(f"{source}: {count}" for source, count in fallbacks.items()) if fallbacks else "none"
+    ))
+    fetched = METRICS.counter_totals('fetch_bytes_total', by='source')
+    if fetched:
+        st.markdown("**Bytes fetched**: " + ", ".join(f"{source}: {count / 1024:,.0f} KiB" for source, count in fetched.items()))
+    
+    col1, col2 = st.columns(2)
+    col1.download_button("Prometheus", METRICS.to_prometheus(), file_name='sentiment_metrics.prom', mime='text/plain')
+    col2.download_button("JSON", json.dumps(METRICS.snapshot(), indent=2), file_name='sentiment_metrics.json', mime='application/json')
+    st.caption("Shared by every session in this process.")
+
 def main():
+    install_log_handler()
+    timings = startup_timings()
+    timings.setdefault('imports', _imports_finished - _script_started)
+    
     # Header
     st.title("🏦 BofA Risk-Love Sentiment Analysis")
     st.markdown("### Professional contrarian sentiment analysis based on Bank of America's 35-indicator methodology")
@@ -410,39 +657,19 @@ def main():
         
         # Momentum scoring
         st.markdown("#### Momentum Scoring")
-        mom_df = pd.DataFrame({
-            'Range': ["> +20%", "+10% to +20%", "-5% to +10%", "-15% to -5%", "< -15%"],
-            'Score': [90, 75, 55, 30, 10],
-            'Interpretation': ["Strong bearish signal", "Bearish signal", "Neutral", "Bullish signal", "Strong bullish signal"]
-        })
-        st.table(mom_df)
+        st.table(scoring_table_frame('momentum'))
         
         # Volatility scoring
         st.markdown("#### Volatility Scoring")
-        vol_df = pd.DataFrame({
-            'Range': ["< 8%", "8% to 15%", "15% to 25%", "25% to 35%", "> 35%"],
-            'Score': [85, 65, 50, 25, 10],
-            'Interpretation': ["Complacency (bearish)", "Low fear (bearish)", "Neutral", "High fear (bullish)", "Extreme fear (bullish)"]
-        })
-        st.table(vol_df)
+        st.table(scoring_table_frame('volatility'))
         
         # Put/Call scoring
         st.markdown("#### Put/Call Ratio Scoring")
-        pc_df = pd.DataFrame({
-            'Range': ["< 0.6", "0.6 to 0.8", "0.8 to 1.0", "> 1.0"],
-            'Score': [80, 60, 40, 20],
-            'Interpretation': ["Low puts = greed (bearish)", "Mild greed (bearish)", "Mild fear (bullish)", "High puts = fear (bullish)"]
-        })
-        st.table(pc_df)
+        st.table(scoring_table_frame('put_call', reverse=True))
         
         # VIX scoring
         st.markdown("#### VIX Index Scoring")
-        vix_df = pd.DataFrame({
-            'Range': ["< 15", "15 to 20", "20 to 25", "25 to 30", "> 30"],
-            'Score': [85, 70, 50, 30, 15],
-            'Interpretation': ["Complacency (bearish)", "Low volatility (bearish)", "Neutral", "Elevated fear (bullish)", "Extreme fear (bullish)"]
-        })
-        st.table(vix_df)
+        st.table(scoring_table_frame('vix', reverse=True))
     
     # Sidebar
     st.sidebar.header("📊 Analysis Settings")
@@ -455,6 +682,33 @@ def main():
         default=['Global', 'Japan', 'China', 'India', 'Emerging Markets']
     )
     
+    data_source = st.sidebar.radio(
+        "Data Source:",
+        options=[SNAPSHOT_SOURCE, LIVE_SOURCE, INTRADAY_SOURCE, ARCHIVE_SOURCE],
+        help="The shared snapshot is refreshed in the background for every session; live refresh fetches and scores in this session; intraday live polls today's bars and updates the results in place; the archive shows what was computed at an earlier time."
+    )
+    if data_source == SNAPSHOT_SOURCE:
+        get_background_refresh()
+    if data_source == INTRADAY_SOURCE:
+        poll_seconds = st.sidebar.slider(
+            "Intraday poll interval (seconds):",
+            min_value=LIVE_POLL_RANGE[0], max_value=LIVE_POLL_RANGE[1],
+            value=LIVE_POLL_SECONDS, step=15
+        )
+    if data_source == ARCHIVE_SOURCE:
+        archive_date = st.sidebar.date_input("As of date (UTC):", value=datetime.now(timezone.utc).date())
+        archive_time = st.sidebar.time_input("As of time (UTC):", value=dt_time(23, 59))
+        compare_date = st.sidebar.date_input(
+            "Compare with (UTC end of day):", value=None,
+            help="Show how each market's score, components and indicators changed since this date"
+        )
+    
+    show_history = st.sidebar.checkbox(
+        "📜 Show historical percentile backfill",
+        value=False,
+        help=f"Score every trading day over the last {BACKFILL_PERIOD} and rank it against its trailing history"
+    )
+    
     # Methodology explanation
     with st.sidebar.expander("🎯 BofA Risk-Love Methodology"):
         st.markdown("""
@@ -487,6 +741,9 @@ def main():
             st.markdown(f"Indicators: {info['count']}")
             st.markdown("---")
     
+    # Filled in once the page has rendered
+    timing_placeholder = st.sidebar.empty()
+    
     # Main content
     if not selected_markets:
         st.warning("Please select at least one market from the sidebar.")
@@ -495,143 +752,81 @@ def main():
     # Analysis section
     st.header("📊 Real-Time Sentiment Analysis")
     
-    # Progress bar
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    # Get sentiment data
-    sentiment_data = {}
-    total_markets = len(selected_markets)
-    
-    for i, market in enumerate(selected_markets):
-        status_text.text(f'Analyzing {market}...')
-        progress_bar.progress((i + 1) / total_markets)
-        
-        market_info = MARKETS[market]
-        market_data = get_market_data(market_info['ticker'], market)
-        risk_love_score = calculate_risk_love_score(market_data)
-        
-        sentiment_data[market] = {
-            'score': risk_love_score,
-            'color': get_sentiment_color(risk_love_score),
-            'interpretation': get_sentiment_interpretation(risk_love_score),
-            'signal': get_trading_signal(risk_love_score),
-            'raw_data': market_data
-        }
-    
-    # Clear progress indicators
-    status_text.empty()
-    progress_bar.empty()
-    
-    # Results display
-    col1, col2 = st.columns([2, 1])
+    # Read the shared background snapshot when available, otherwise compute live
+    snapshot = read_latest_snapshot() if data_source == SNAPSHOT_SOURCE else None
+    if data_source == ARCHIVE_SOURCE:
+        as_of = datetime.combine(archive_date, archive_time, tzinfo=timezone.utc)
+        archived = get_archive().as_of(as_of, selected_markets)
+        if archived.empty:
+            st.warning(f"Nothing was archived at or before {as_of.strftime('%Y-%m-%d %H:%M UTC')}.")
+            return
+        archived = archived.reindex([market for market in selected_markets if market in archived.index])
+        sentiment_data = archived_sentiment_data(archived)
+        # Each market comes from its own latest snapshot, so the sources may differ
+        latest = archived.loc[archived['generated_at'].idxmax()]
+        generated_at = latest['generated_at'].to_pydatetime()
+        snapshots = archived['generated_at'].nunique()
+        st.caption(
+            f"🗄️ Archived {latest['source']} snapshot from {generated_at.strftime('%Y-%m-%d %H:%M:%S UTC')}"
+            + ("" if snapshots == 1 else f" and {snapshots - 1} earlier snapshot(s) for the other markets")
+            + ("" if len(archived) == len(selected_markets) else f" ({len(archived)} of {len(selected_markets)} selected markets)")
+        )
+    elif data_source == INTRADAY_SOURCE:
+        # Only this fragment reruns on each poll; the rest of the page stays as drawn
+        generated_at = datetime.now(timezone.utc)
+        st.fragment(run_every=poll_seconds)(live_results)(selected_markets)
+    elif snapshot is not None and all(market in snapshot['markets'] for market in selected_markets):
+        sentiment_data = snapshot_sentiment_data(snapshot, selected_markets)
+        generated_at = datetime.fromisoformat(snapshot['generated_at'])
+        st.caption(
+            f"📦 Shared snapshot from {generated_at.strftime('%Y-%m-%d %H:%M:%S UTC')} "
+            f"({format_age(snapshot_age_seconds(snapshot))} old, refreshed every {REFRESH_INTERVAL_SECONDS // 60} min)"
+        )
+    else:
+        if data_source == SNAPSHOT_SOURCE:
+            st.info("No shared snapshot covers this selection yet; computing live.")
+        generated_at = datetime.now(timezone.utc)
+        sentiment_data = compute_live_sentiment(selected_markets)
+        archive_snapshot(sentiment_data, generated_at, source='live')
     
-    with col1:
-        st.subheader("🎯 Risk-Love Sentiment Heatmap")
-        
-        # Create and display heatmap
-        fig = create_heatmap(sentiment_data)
-        st.pyplot(fig)
-        plt.close(fig)
+    if data_source != INTRADAY_SOURCE:
+        show_results(sentiment_data)
+    if data_source == ARCHIVE_SOURCE and compare_date is not None:
+        show_archive_changes(datetime.combine(compare_date, dt_time(23, 59, 59), tzinfo=timezone.utc), as_of, selected_markets)
     
-    with col2:
-        st.subheader("🚨 Trading Signals")
-        
-        # Extreme alerts
-        extreme_signals = []
-        for market, data in sentiment_data.items():
-            score = data['score']
-            if score <= 20 or score >= 80:
-                signal_type = "🟢 BUY" if score <= 20 else "🔴 SELL"
-                extreme_signals.append((market, score, signal_type))
-        
-        if extreme_signals:
-            st.markdown("**⚡ EXTREME SIGNALS:**")
-            for market, score, signal in extreme_signals:
-                st.markdown(f"{signal} **{market}** ({score}th percentile)")
-            st.markdown("---")
-        
-        # Global sentiment summary
-        if 'Global' in sentiment_data:
-            global_score = sentiment_data['Global']['score']
-            global_interp, global_icon = sentiment_data['Global']['interpretation']
-            st.markdown(f"**🌍 GLOBAL SENTIMENT**")
-            st.markdown(f"{global_icon} {global_score}th percentile")
-            st.markdown(f"*{global_interp}*")
-            st.markdown("---")
-        
-        # Summary table
-        st.subheader("📋 Summary Table")
-        
-        df_data = []
-        for market, data in sentiment_data.items():
-            df_data.append({
-                'Market': MARKETS[market]['name'],
-                'Score': data['score'],
-                'Signal': data['signal'][0],
-                'Status': data['interpretation'][1]
-            })
-        
-        df = pd.DataFrame(df_data)
-        st.dataframe(df, width='stretch')
+    # Historical backfill
+    if show_history:
+        st.header("📜 Risk-Love Percentile History")
+        with st.spinner(f"Backfilling {BACKFILL_PERIOD} of daily scores..."):
+            percentile_history = load_percentile_history(tuple(selected_markets), current_trading_date())
+        
+        if percentile_history.empty:
+            st.warning("No price history available for the selected markets.")
+        else:
+            st.line_chart(percentile_history.rename(columns=lambda m: MARKETS[m]['name']).dropna(how='all'))
+            st.caption(
+                f"Each day's score ranked against the trailing {PERCENTILE_WINDOW} trading days "
+                f"of the same market. Put/call history is not available, so that component is neutral."
+            )
     
-    # Detailed analysis
-    st.header("📈 Detailed Market Analysis")
+    # Detailed analysis (the intraday fragment draws its own, updated on every poll)
+    if data_source != INTRADAY_SOURCE:
+        st.header("📈 Detailed Market Analysis")
+        show_market_details(sentiment_data)
     
-    for market, data in sentiment_data.items():
-        with st.expander(f"📊 {MARKETS[market]['name']} - {data['score']}th percentile"):
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.metric(
-                    "Risk-Love Score", 
-                    f"{data['score']}th percentile"
-                )
-            
-            with col2:
-                st.markdown(f"**Interpretation:**")
-                st.markdown(f"{data['interpretation'][1]} {data['interpretation'][0]}")
-            
-            with col3:
-                st.markdown(f"**Trading Signal:**")
-                st.markdown(f"{data['signal'][0]}")
-                st.markdown(f"*{data['signal'][1]}*")
-            
-                # Raw data if available
-            if data['raw_data']:
-                st.markdown("**Technical Indicators:**")
-                raw_data = data['raw_data']
-                
-                # First row of metrics
-                col1, col2, col3, col4 = st.columns(4)
-                
-                with col1:
-                    st.metric("20D Momentum", f"{raw_data.get('momentum_20d', 0):.1f}%")
-                
-                with col2:
-                    st.metric("Volatility", f"{raw_data.get('volatility', 0):.1f}%")
-                
-                with col3:
-                    st.metric("1M Performance", f"{raw_data.get('perf_1m', 0):.1f}%")
-                
-                with col4:
-                    st.metric("3M Performance", f"{raw_data.get('perf_3m', 0):.1f}%")
-                
-                # Second row for VIX and Put/Call if available
-                if raw_data.get('vix') is not None or raw_data.get('put_call_ratio') is not None:
-                    st.markdown("**Sentiment Indicators:**")
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        if raw_data.get('vix') is not None:
-                            st.metric("VIX Index", f"{raw_data.get('vix', 0):.1f}")
-                    
-                    with col2:
-                        if raw_data.get('put_call_ratio') is not None:
-                            st.metric("Put/Call Ratio", f"{raw_data.get('put_call_ratio', 0):.2f}")    # Footer
+    # Footer
     st.markdown("---")
-    st.markdown(f"**📊 Analysis generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}")
+    st.markdown(f"**📊 Analysis generated:** {generated_at.strftime('%Y-%m-%d %H:%M:%S UTC')}")
     st.markdown("**🏦 Source:** BofA Risk-Love Methodology (35-Indicator Contrarian Framework)")
+    
+    # Startup timing report (first run in this process) plus this run's time
+    timings.setdefault('first_render', time.perf_counter() - _script_started)
+    with timing_placeholder.container():
+        with st.expander("⏱️ Startup Timing"):
+            st.json(startup_report(**timings))
+            st.caption(f"This run: {time.perf_counter() - _script_started:.2f}s")
+        with st.expander("🩺 Diagnostics"):
+            show_diagnostics()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,329 @@
+"""Read-only JSON API over the shared sentiment snapshot
+
+Serves the latest snapshot written by ``sentiment_scheduler`` (per-market
+score, interpretation, signal and raw indicators) and the daily score
+history derived from the local price store. Nothing here fetches from
+upstream: each snapshot version is serialized and gzipped once, and
+requests are answered from those bytes, with ETag/If-None-Match support.
+
+Endpoints:
+    GET /v1/scores                  every market in the snapshot
+    GET /v1/scores/<market>         one market (URL-encoded name)
+    GET /v1/history?markets=Japan,China&days=60   (put/call neutral before the snapshot's date)
+    GET /healthz                    snapshot age
+    GET /metrics                    Prometheus text
+
+Examples:
+    python sentiment_api.py                        # http://127.0.0.1:8502
+    python sentiment_api.py --host 0.0.0.0 --port 9000
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+
+from sentiment_core import (
+    MARKETS, VIX_TICKER, compute_indicator_history, read_stored_history, score_indicator_frame
+)
+from sentiment_metrics import METRICS
+from sentiment_scheduler import load_snapshot, snapshot_age_seconds, snapshot_path
+
+logger = logging.getLogger(__name__)
+
+API_HOST = '127.0.0.1'
+API_PORT = 8502
+SNAPSHOT_CHECK_SECONDS = 1.0   # How often to stat the snapshot file for a newer version
+HISTORY_DAYS = 126             # Default number of daily scores per market
+GZIP_MIN_BYTES = 512           # Smaller bodies are sent uncompressed
+GZIP_LEVEL = 6
+MAX_CACHED_RESPONSES = 256     # Per snapshot version; distinct history queries beyond this are rebuilt
+
+class Payload:
+    """A serialized JSON response with its gzipped body and ETag"""
+    
+    def __init__(self, obj):
+        self.body = json.dumps(obj, separators=(',', ':')).encode()
+        self.gzipped = gzip.compress(self.body, GZIP_LEVEL) if len(self.body) >= GZIP_MIN_BYTES else None
+        self.etag = f'W/"{hashlib.sha1(self.body).hexdigest()[:20]}"'
+
+def stored_score_history(markets=None, snapshot=None):
+    """Daily scores (date x market) computed from the local price store only
+    
+    There is no put/call history, so put/call scores as missing, except on
+    the ``snapshot``'s date: there each market gets the snapshot's put/call
+    ratio, and the last point matches /v1/scores.
+    """
+    markets = list(MARKETS) if markets is None else list(markets)
+    vix_hist = read_stored_history(VIX_TICKER)
+    vix_close = vix_hist['Close'] if not vix_hist.empty else None
+    snapshot_date = pd.Timestamp(snapshot['generated_at']).tz_localize(None).normalize() if snapshot else None
+    
+    histories = {}
+    for market in markets:
+        hist = read_stored_history(MARKETS[market]['ticker'])
+        if hist.empty:
+            continue
+        history = compute_indicator_history(hist, vix_close)
+        put_call = ((snapshot or {}).get('markets', {}).get(market, {}).get('raw_data') or {}).get('put_call_ratio')
+        if put_call is not None:
+            # The snapshot was scored on the last bar at or before its date
+            position = history.index.searchsorted(snapshot_date, side='right') - 1
+            if position >= 0:
+                history.iloc[position, history.columns.get_loc('put_call_ratio')] = put_call
+        histories[market] = history
+    if not histories:
+        return pd.DataFrame()
+    return score_indicator_frame(pd.concat(histories, names=['market', 'Date'])).unstack('market')
+
+class SnapshotCache:
+    """Latest snapshot and the responses built from it, rebuilt when the file changes"""
+    
+    def __init__(self, path=None, check_interval=SNAPSHOT_CHECK_SECONDS):
+        self.path = path or snapshot_path()
+        self.check_interval = check_interval
+        self.snapshot = None
+        self._modified_at = None
+        self._checked_at = 0.0
+        self._responses = {}
+        self._history = None
+        self._lock = threading.Lock()
+        self._history_lock = threading.Lock()
+    
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        try:
+            modified_at = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if modified_at == self._modified_at:
+            return
+        snapshot = load_snapshot(self.path)
+        if snapshot is None:
+            return
+        self.snapshot = snapshot
+        self._modified_at = modified_at
+        self._responses = {}
+        self._history = None
+        METRICS.increment('api_snapshot_reloads_total')
+    
+    def current(self):
+        """Latest snapshot (None until the scheduler has written one)"""
+        with self._lock:
+            self._refresh()
+            return self.snapshot
+    
+    def response(self, key, build):
+        """Cached Payload for ``key`` under the current snapshot, built on first use"""
+        with self._lock:
+            self._refresh()
+            if self.snapshot is None:
+                return None
+            payload = self._responses.get(key)
+            METRICS.record_cache('api_response', payload is not None)
+            if payload is None:
+                payload = Payload(build(self.snapshot))
+                if len(self._responses) >= MAX_CACHED_RESPONSES:
+                    self._responses.clear()
+                self._responses[key] = payload
+            return payload
+    
+    def score_history(self):
+        """(snapshot, score history) for the current snapshot version
+        
+        The history is computed outside the snapshot lock, so other
+        endpoints keep answering while it is built; concurrent history
+        requests wait for the one computing it.
+        """
+        with self._history_lock:
+            with self._lock:
+                self._refresh()
+                snapshot, history = self.snapshot, self._history
+            if snapshot is None or history is not None:
+                return snapshot, history
+            with METRICS.timer('api_history'):
+                history = stored_score_history(list(snapshot['markets']), snapshot)
+            with self._lock:
+                # A newer snapshot may have arrived meanwhile; keep only a current history
+                if self.snapshot is snapshot:
+                    self._history = history
+            return snapshot, history
+
+def _history_body(history_snapshot, history, markets, days):
+    def build(snapshot):
+        columns = [market for market in markets if market in history.columns]
+        recent = history[columns].tail(days)
+        return {
+            'generated_at': history_snapshot['generated_at'],
+            'markets': {
+                market: [{'date': date.strftime('%Y-%m-%d'), 'score': int(score)}
+                         for date, score in recent[market].dropna().items()]
+                for market in columns
+            }
+        }
+    return build
+
+class SentimentAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'RiskLoveAPI/1.0'
+    # Headers and body go out as separate writes; without TCP_NODELAY each
+    # keep-alive response waits on the client's delayed ACK (~40ms)
+    disable_nagle_algorithm = True
+    
+    def do_GET(self):
+        self._handle(head_only=False)
+    
+    def do_HEAD(self):
+        self._handle(head_only=True)
+    
+    def _handle(self, head_only):
+        # Set on every request: the handler instance is reused for the whole keep-alive connection
+        self.head_only = head_only
+        url = urlsplit(self.path)
+        route = url.path.rstrip('/') or '/'
+        endpoint = route.split('/')[2] if route.startswith('/v1/') else route.lstrip('/')
+        try:
+            status = self._dispatch(route, parse_qs(url.query))
+        except Exception:
+            logger.exception("API request %s failed", self.path)
+            status = self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, "internal error")
+        METRICS.increment('api_requests_total', endpoint=endpoint or 'root', status=int(status))
+    
+    def _dispatch(self, route, query):
+        cache = self.server.cache
+        if route == '/healthz':
+            snapshot = cache.current()
+            if snapshot is None:
+                return self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, "no snapshot yet")
+            return self._send_json({
+                'status': 'ok',
+                'generated_at': snapshot['generated_at'],
+                'age_seconds': round(snapshot_age_seconds(snapshot), 1)
+            }, cache_control='no-cache')
+        if route == '/metrics':
+            return self._send_bytes(METRICS.to_prometheus().encode(), 'text/plain; version=0.0.4', cache_control='no-cache')
+        
+        if cache.current() is None:
+            return self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, "no snapshot yet")
+        
+        if route == '/v1/scores':
+            payload = cache.response('scores', lambda snapshot: snapshot)
+        elif route.startswith('/v1/scores/'):
+            market = unquote(route[len('/v1/scores/'):])
+            if market not in cache.current()['markets']:
+                return self._send_error(HTTPStatus.NOT_FOUND, f"unknown market: {market}")
+            payload = cache.response(('score', market), lambda snapshot: {
+                'generated_at': snapshot['generated_at'],
+                'market': market,
+                **snapshot['markets'][market]
+            })
+        elif route == '/v1/history':
+            known = list(cache.current()['markets'])
+            requested = [m for value in query.get('markets', []) for m in value.split(',') if m] or known
+            unknown = [market for market in requested if market not in known]
+            if unknown:
+                return self._send_error(HTTPStatus.NOT_FOUND, f"unknown market(s): {', '.join(unknown)}")
+            try:
+                days = int(query.get('days', [HISTORY_DAYS])[0])
+            except ValueError:
+                return self._send_error(HTTPStatus.BAD_REQUEST, "days must be an integer")
+            if days < 1:
+                return self._send_error(HTTPStatus.BAD_REQUEST, "days must be positive")
+            history_snapshot, history = cache.score_history()
+            if history_snapshot is None:
+                return self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, "no snapshot yet")
+            # The key names the snapshot the history was built for, in case a newer one arrived meanwhile
+            payload = cache.response(('history', history_snapshot['generated_at'], tuple(requested), days),
+                                     _history_body(history_snapshot, history, requested, days))
+        else:
+            return self._send_error(HTTPStatus.NOT_FOUND, f"no such endpoint: {route}")
+        
+        if payload is None:
+            return self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, "no snapshot yet")
+        return self._send_payload(payload)
+    
+    def _not_modified(self, etag):
+        header = self.headers.get('If-None-Match')
+        if not header:
+            return False
+        tags = {tag.strip() for tag in header.split(',')}
+        # Weak comparison: W/"x" and "x" name the same representation
+        return '*' in tags or etag in tags or etag[2:] in tags
+    
+    def _send_payload(self, payload):
+        max_age = int(self.server.cache.check_interval)
+        if self._not_modified(payload.etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', payload.etag)
+            self.send_header('Cache-Control', f'max-age={max_age}')
+            self.end_headers()
+            return HTTPStatus.NOT_MODIFIED
+        use_gzip = payload.gzipped is not None and 'gzip' in self.headers.get('Accept-Encoding', '')
+        return self._send_bytes(payload.gzipped if use_gzip else payload.body, 'application/json',
+                                etag=payload.etag, encoding='gzip' if use_gzip else None,
+                                cache_control=f'max-age={max_age}')
+    
+    def _send_json(self, obj, status=HTTPStatus.OK, cache_control=None):
+        return self._send_bytes(json.dumps(obj).encode(), 'application/json', status=status, cache_control=cache_control)
+    
+    def _send_error(self, status, message):
+        return self._send_json({'error': message}, status=status, cache_control='no-cache')
+    
+    def _send_bytes(self, body, content_type, status=HTTPStatus.OK, etag=None, encoding=None, cache_control=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if etag:
+            self.send_header('ETag', etag)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        if cache_control:
+            self.send_header('Cache-Control', cache_control)
+        self.end_headers()
+        if not self.head_only:
+            self.wfile.write(body)
+        return status
+    
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+class SentimentAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    
+    def __init__(self, address, cache=None):
+        super().__init__(address, SentimentAPIHandler)
+        self.cache = cache or SnapshotCache()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the shared Risk-Love snapshot as a read-only JSON API.")
+    parser.add_argument('--host', default=API_HOST, help=f"Address to bind (default: {API_HOST})")
+    parser.add_argument('--port', type=int, default=API_PORT, help=f"Port to listen on (default: {API_PORT})")
+    parser.add_argument('--path', default=snapshot_path(), help="Snapshot file to serve")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    server = SentimentAPIServer((args.host, args.port), SnapshotCache(args.path))
+    logger.info("Serving %s on http://%s:%d", args.path, args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
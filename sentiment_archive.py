@@ -0,0 +1,488 @@
+"""As-of archive of every computed sentiment snapshot
+
+Each snapshot (scheduler refresh, live dashboard run or intraday poll) is
+appended as one row per market: score, component scores and the raw
+indicators. An append writes one small part file into its UTC day's
+directory (``YYYY/YYYY-MM-DD/part-<ns>.parquet``) and one line to the
+append-only ``index.csv``; nothing already written is rewritten. Every
+ARCHIVE_SEGMENT_PARTS parts of a day are merged into a segment file, and
+once a later day is being written a finished day's segments and parts are
+compacted into one ``YYYY/YYYY-MM-DD.parquet``, so each row is rewritten a
+bounded number of times however many snapshots a day holds. Readers only
+parse the index lines added since their last look. A snapshot whose scores
+and indicators match the previous entry from the same source for the same
+markets is not stored again (reruns and polls that compute nothing new);
+a return to an older state is.
+The index also names the markets of each snapshot, so an as-of lookup
+resolves every market on its own: a live run for a few markets does not
+hide the full scheduler snapshot before it. It is a binary search of the
+index, a backward scan for the requested markets and a read of the day
+files holding them; a market's history reads only the days in range. Colours,
+interpretations and signals are derived from the score, so they are not
+stored.
+
+Examples:
+    python sentiment_archive.py list
+    python sentiment_archive.py as-of "2026-10-01 15:00"
+    python sentiment_archive.py diff 2026-09-01 2026-10-01 --markets Japan China
+    python sentiment_archive.py history Japan --start 2026-09-01
+    python sentiment_archive.py compact
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from sentiment_core import (
+    MARKETS,
+    INDICATOR_DEFAULTS,
+    SCORING_TABLES,
+    score_components,
+    indicator_frame,
+    build_sentiment_entry
+)
+from sentiment_metrics import METRICS
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within a process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'archive')
+ARCHIVE_INDEX = 'index.csv'
+ARCHIVE_LOCK = '.lock'
+ARCHIVE_SEGMENT_PARTS = 64     # Part files of a day merged into one segment file
+MARKET_SEPARATOR = '|'         # Joins a snapshot's market names in the index
+INDEX_COLUMNS = ['generated_at', 'source', 'markets', 'fingerprint']
+ARCHIVE_FIELDS = list(INDICATOR_DEFAULTS) + ['current_price']
+COMPONENT_COLUMNS = [f'component:{name}' for name in SCORING_TABLES]
+
+def _timestamp(value):
+    """UTC Timestamp for a datetime, string or Timestamp (naive values are taken as UTC)"""
+    ts = pd.Timestamp(value)
+    return ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
+
+def snapshot_fingerprint(sentiment_data):
+    """Hash of every market's score and raw indicators, independent of when they were computed"""
+    payload = [(market, data['score'], sorted((data['raw_data'] or {}).items()))
+               for market, data in sentiment_data.items()]
+    return hashlib.sha1(json.dumps(payload, default=str).encode()).hexdigest()[:16]
+
+def _empty_index():
+    return pd.DataFrame({
+        'generated_at': pd.Series(dtype='datetime64[ns, UTC]'),
+        'source': pd.Series(dtype=str),
+        'markets': pd.Series(dtype=str),
+        'fingerprint': pd.Series(dtype=str),
+        'market_set': pd.Series(dtype=np.int32)
+    })
+
+def snapshot_rows(sentiment_data, generated_at, source):
+    """Archive rows (one per market) for a dashboard ``sentiment_data`` dict"""
+    markets = list(sentiment_data)
+    raw = pd.DataFrame([sentiment_data[market]['raw_data'] or {} for market in markets], index=range(len(markets)))
+    raw = raw.reindex(columns=ARCHIVE_FIELDS).apply(pd.to_numeric, errors='coerce')
+    has_data = np.array([bool(sentiment_data[market]['raw_data']) for market in markets])
+    
+    rows = pd.DataFrame({
+        'generated_at': pd.Series(_timestamp(generated_at), index=raw.index),
+        'market': markets,
+        'source': source,
+        'score': np.array([sentiment_data[market]['score'] for market in markets], dtype=np.int16)
+    })
+    # Components are scored like the composite: indicators a market lacks take their defaults
+    records = {i: sentiment_data[market]['raw_data'] or {} for i, market in enumerate(markets)}
+    components = score_components(indicator_frame(records)) if len(raw) else pd.DataFrame(columns=list(SCORING_TABLES))
+    for name in SCORING_TABLES:
+        rows[f'component:{name}'] = pd.array(components[name], dtype='Int8')
+        rows.loc[~has_data, f'component:{name}'] = pd.NA
+    for field in ARCHIVE_FIELDS:
+        rows[field] = raw[field].astype(np.float32)
+    return rows.astype({'market': 'category', 'source': 'category'})
+
+def archived_sentiment_data(frame):
+    """Rebuild the dashboard's sentiment_data layout from archive rows indexed by market"""
+    sentiment_data = {}
+    for market, row in frame.iterrows():
+        raw_data = {field: (None if pd.isna(row[field]) else float(row[field])) for field in ARCHIVE_FIELDS}
+        has_data = any(value is not None for value in raw_data.values())
+        sentiment_data[market] = build_sentiment_entry(int(row['score']), raw_data if has_data else None)
+    return sentiment_data
+
+def _write_parquet(frame, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    frame.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+def _read_parquet_files(paths, filters=None):
+    """Concatenated rows of several archive files, ordered by time"""
+    frames = [pd.read_parquet(path, filters=filters) for path in paths]
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+    rows = pd.concat([frame.astype({'market': str, 'source': str}) for frame in frames], ignore_index=True)
+    rows = rows.sort_values('generated_at', kind='stable', ignore_index=True)
+    return rows.astype({'market': 'category', 'source': 'category'})
+
+class SnapshotArchive:
+    """Date-partitioned Parquet archive of snapshots with an in-memory time index"""
+    
+    def __init__(self, directory=None):
+        self.directory = directory or ARCHIVE_DIR
+        self._lock = threading.Lock()
+        self._append_lock = threading.Lock()
+        self._index = _empty_index()
+        self._index_offset = 0
+        # Fingerprint of the last appended entry per (source, markets)
+        self._previous = {}
+        # Distinct market lists seen in the index; 'market_set' holds positions in this list
+        self._market_sets = []
+        self._market_set_codes = {}
+        # Last day appended to by this process; days before it are compacted on a day change
+        self._append_day = None
+    
+    def _market_set_code(self, markets):
+        code = self._market_set_codes.get(markets)
+        if code is None:
+            code = self._market_set_codes[markets] = len(self._market_sets)
+            self._market_sets.append(frozenset(markets.split(MARKET_SEPARATOR)))
+        return code
+    
+    def _index_path(self):
+        return os.path.join(self.directory, ARCHIVE_INDEX)
+    
+    def _day_path(self, ts):
+        return os.path.join(self.directory, f"{ts:%Y}", f"{ts:%Y-%m-%d}.parquet")
+    
+    def _day_dir(self, ts):
+        return os.path.join(self.directory, f"{ts:%Y}", f"{ts:%Y-%m-%d}")
+    
+    @contextmanager
+    def _file_lock(self, exclusive):
+        """flock on the archive: exclusive for appends and compaction, shared for reads"""
+        if fcntl is None or not os.path.isdir(self.directory):
+            yield
+            return
+        with open(os.path.join(self.directory, ARCHIVE_LOCK), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+    
+    def index(self):
+        """Every archived snapshot (generated_at, source, markets, fingerprint, market_set), oldest first
+        
+        Only the lines appended since the last call are parsed.
+        """
+        with self._lock:
+            try:
+                size = os.path.getsize(self._index_path())
+            except OSError:
+                size = 0
+            if size < self._index_offset:
+                # The index was replaced (e.g. the archive was deleted): start over
+                self._index, self._index_offset = _empty_index(), 0
+                self._previous = {}
+                self._market_sets, self._market_set_codes = [], {}
+            if size > self._index_offset:
+                with open(self._index_path(), 'rb') as f:
+                    f.seek(self._index_offset)
+                    chunk = f.read(size - self._index_offset)
+                # A writer may be mid-line; leave the partial line for next time
+                chunk = chunk[:chunk.rfind(b'\n') + 1]
+                if chunk:
+                    entries = pd.read_csv(io.BytesIO(chunk), names=INDEX_COLUMNS, header=None,
+                                          dtype={'source': str, 'markets': str, 'fingerprint': str})
+                    entries['generated_at'] = pd.to_datetime(entries['generated_at'], utc=True, format='ISO8601')
+                    entries['market_set'] = entries['markets'].map(self._market_set_code).astype(np.int32)
+                    # Lines are in append order, so the last one per key is the previous entry
+                    latest = entries.drop_duplicates(['source', 'markets'], keep='last')
+                    self._previous.update(zip(zip(latest['source'], latest['markets']), latest['fingerprint']))
+                    index = pd.concat([self._index, entries], ignore_index=True) if len(self._index) else entries
+                    if not index['generated_at'].is_monotonic_increasing:
+                        index = index.sort_values('generated_at', kind='stable', ignore_index=True)
+                    self._index = index
+                    self._index_offset += len(chunk)
+            return self._index
+    
+    def _already_archived(self, ts, source, markets, fingerprint):
+        index = self.index()
+        if not len(index):
+            return False
+        times = index['generated_at']
+        position = times.searchsorted(ts)
+        if position < len(times) and times.iloc[position] == ts:
+            return True
+        with self._lock:
+            return self._previous.get((source, markets)) == fingerprint
+    
+    def append(self, sentiment_data, generated_at, source='live'):
+        """Add a snapshot; returns False if it is already archived or unchanged since the previous one
+        
+        Unchanged means the same scores and indicators as the previous entry
+        from the same ``source`` for the same markets.
+        """
+        if not sentiment_data:
+            return False
+        ts = _timestamp(generated_at)
+        markets = MARKET_SEPARATOR.join(sentiment_data)
+        fingerprint = snapshot_fingerprint(sentiment_data)
+        # Cheap check without the file lock: most dashboard reruns stop here
+        if self._already_archived(ts, source, markets, fingerprint):
+            return False
+        
+        with METRICS.timer('archive_append'), self._append_lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with self._file_lock(exclusive=True):
+                if self._already_archived(ts, source, markets, fingerprint):
+                    return False
+                
+                day_dir = self._day_dir(ts)
+                _write_parquet(snapshot_rows(sentiment_data, ts, source), os.path.join(day_dir, f"part-{ts.value}.parquet"))
+                with open(self._index_path(), 'a', newline='') as f:
+                    csv.writer(f).writerow([ts.isoformat(), source, markets, fingerprint])
+                
+                try:
+                    self._merge_parts(day_dir)
+                    if self._append_day != ts.normalize():
+                        self._append_day = ts.normalize()
+                        self._compact(before=self._append_day)
+                except Exception as e:
+                    # The part file and index line are written; compaction is retried later
+                    logger.warning(f"Archive compaction failed: {e}")
+                return True
+    
+    def _day_files(self, day_dir):
+        """Segment and part files of an uncompacted day, oldest first"""
+        try:
+            names = os.listdir(day_dir)
+        except OSError:
+            return [], []
+        segments = sorted(name for name in names if name.startswith('seg-') and name.endswith('.parquet'))
+        parts = sorted(name for name in names if name.startswith('part-') and name.endswith('.parquet'))
+        return [os.path.join(day_dir, name) for name in segments], [os.path.join(day_dir, name) for name in parts]
+    
+    def _merge_parts(self, day_dir):
+        """Merge a day's parts into a segment once ARCHIVE_SEGMENT_PARTS have piled up (lock held)"""
+        _, parts = self._day_files(day_dir)
+        if len(parts) < ARCHIVE_SEGMENT_PARTS:
+            return
+        first, last = (os.path.basename(path)[len('part-'):-len('.parquet')] for path in (parts[0], parts[-1]))
+        _write_parquet(_read_parquet_files(parts), os.path.join(day_dir, f"seg-{first}-{last}.parquet"))
+        for path in parts:
+            os.remove(path)
+    
+    def compact(self, before=None):
+        """Fold the segments and parts of every day before ``before`` (all days if None) into its day file"""
+        with self._append_lock, self._file_lock(exclusive=True):
+            self._compact(None if before is None else _timestamp(before))
+    
+    def _compact(self, before):
+        years = sorted(os.listdir(self.directory)) if os.path.isdir(self.directory) else []
+        for year in years:
+            year_dir = os.path.join(self.directory, year)
+            if not (year.isdigit() and os.path.isdir(year_dir)):
+                continue
+            for name in sorted(os.listdir(year_dir)):
+                day_dir = os.path.join(year_dir, name)
+                if not os.path.isdir(day_dir) or (before is not None and _timestamp(name) >= before):
+                    continue
+                segments, parts = self._day_files(day_dir)
+                day_path = f"{day_dir}.parquet"
+                existing = [day_path] if os.path.exists(day_path) else []
+                if segments or parts:
+                    _write_parquet(_read_parquet_files(existing + segments + parts), day_path)
+                for path in segments + parts:
+                    os.remove(path)
+                os.rmdir(day_dir)
+    
+    def _snapshot_paths(self, ts):
+        """Files that can hold the snapshot taken at ``ts``: its part, a segment spanning it or the day file"""
+        part = os.path.join(self._day_dir(ts), f"part-{ts.value}.parquet")
+        if os.path.exists(part):
+            return [part]
+        segments, _ = self._day_files(self._day_dir(ts))
+        spanning = []
+        for path in segments:
+            first, last = os.path.basename(path)[len('seg-'):-len('.parquet')].split('-')
+            if int(first) <= ts.value <= int(last):
+                spanning.append(path)
+        day_path = self._day_path(ts)
+        return spanning or ([day_path] if os.path.exists(day_path) else [])
+    
+    def _read_day(self, ts, filters=None):
+        """A day's rows from its day file, segments and parts (shared lock held)"""
+        day_path = self._day_path(ts)
+        segments, parts = self._day_files(self._day_dir(ts))
+        paths = ([day_path] if os.path.exists(day_path) else []) + segments + parts
+        return _read_parquet_files(paths, filters)
+    
+    def entries_at(self, when, markets=None):
+        """Time of the latest snapshot at or before ``when`` holding each market
+        
+        Returns a Series of generated_at indexed by market (every archived
+        market if ``markets`` is None); markets not archived by then are left
+        out. The index is scanned backwards in growing blocks, so the usual
+        case of a recent full snapshot touches only the last few entries.
+        """
+        index = self.index()
+        with self._lock:
+            market_sets = list(self._market_sets)
+        known = frozenset().union(*market_sets)
+        wanted = [m for m in dict.fromkeys(sorted(known) if markets is None else markets) if m in known]
+        holds = {market: np.array([market in market_set for market_set in market_sets]) for market in wanted}
+        
+        times = index['generated_at']
+        codes = index['market_set'].to_numpy()
+        end = times.searchsorted(_timestamp(when), side='right')
+        found, block = {}, 256
+        while end > 0 and len(found) < len(wanted):
+            start = max(0, end - block)
+            block_codes = codes[start:end]
+            for market in wanted:
+                if market not in found:
+                    hits = np.flatnonzero(holds[market][block_codes])
+                    if len(hits):
+                        found[market] = times.iloc[start + hits[-1]]
+            end, block = start, block * 4
+        return pd.Series({market: found[market] for market in wanted if market in found}, dtype=times.dtype)
+    
+    def read_snapshot(self, generated_at, markets=None):
+        """Rows of one archived snapshot indexed by market"""
+        ts = _timestamp(generated_at)
+        filters = [('generated_at', '==', ts)]
+        if markets is not None:
+            filters.append(('market', 'in', list(markets)))
+        with self._file_lock(exclusive=False):
+            rows = _read_parquet_files(self._snapshot_paths(ts), filters)
+        if rows.empty:
+            return rows
+        rows['market'] = rows['market'].astype(str)
+        return rows.set_index('market')
+    
+    def as_of(self, when, markets=None):
+        """Each market's latest archived row at or before ``when``, indexed by market
+        
+        Markets may come from different snapshots (see the generated_at and
+        source columns). Returns an empty frame if none of them was archived
+        by then.
+        """
+        entries = self.entries_at(when, markets)
+        if entries.empty:
+            return pd.DataFrame()
+        frames = [self.read_snapshot(generated_at, group.index) for generated_at, group in entries.groupby(entries)]
+        return pd.concat(frames).reindex(entries.index)
+    
+    def market_history(self, market, start=None, end=None):
+        """Every archived row for ``market`` between ``start`` and ``end``, indexed by time"""
+        times = self.index()['generated_at']
+        if times.empty:
+            return pd.DataFrame()
+        start = _timestamp(start) if start is not None else times.iloc[0]
+        end = _timestamp(end) if end is not None else times.iloc[-1]
+        if start > end:
+            return pd.DataFrame()
+        
+        filters = [('market', '==', market), ('generated_at', '>=', start), ('generated_at', '<=', end)]
+        frames = []
+        with self._file_lock(exclusive=False):
+            for day in pd.date_range(start.normalize(), end.normalize(), freq='D'):
+                rows = self._read_day(day, filters)
+                if len(rows):
+                    frames.append(rows.astype({'market': str, 'source': str}))
+        if not frames:
+            return pd.DataFrame()
+        history = pd.concat(frames, ignore_index=True).drop(columns=['market'])
+        return history.astype({'source': 'category'}).set_index('generated_at')
+    
+    def diff(self, start, end, markets=None):
+        """Score, component and indicator changes per market between the as-of snapshots at two times
+        
+        Columns are a ('from' | 'to' | 'change', field) MultiIndex; markets
+        missing from either snapshot are left out.
+        """
+        before, after = self.as_of(start, markets), self.as_of(end, markets)
+        if before.empty or after.empty:
+            return pd.DataFrame()
+        fields = ['score'] + COMPONENT_COLUMNS + ARCHIVE_FIELDS
+        common = before.index.intersection(after.index)
+        before = before.loc[common, fields].astype(float)
+        after = after.loc[common, fields].astype(float)
+        return pd.concat({'from': before, 'to': after, 'change': after - before}, axis=1)
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+def get_archive(directory=None):
+    """Shared SnapshotArchive for ``directory`` (ARCHIVE_DIR by default)"""
+    directory = directory or ARCHIVE_DIR
+    with _archives_lock:
+        return _archives.setdefault(directory, SnapshotArchive(directory))
+
+def archive_snapshot(sentiment_data, generated_at, source='live', directory=None):
+    """Append a snapshot to the archive; failures are logged, never raised"""
+    try:
+        return get_archive(directory).append(sentiment_data, generated_at, source)
+    except Exception as e:
+        logger.warning(f"Could not archive snapshot: {e}")
+        return False
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the as-of archive of Risk-Love snapshots.")
+    parser.add_argument('--dir', default=ARCHIVE_DIR, help="Archive directory")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="Archived snapshot times")
+    as_of = commands.add_parser('as-of', help="Scores as shown at a time")
+    as_of.add_argument('when')
+    as_of.add_argument('--markets', nargs='+', metavar='MARKET')
+    diff = commands.add_parser('diff', help="Score and component changes between two times")
+    diff.add_argument('start')
+    diff.add_argument('end')
+    diff.add_argument('--markets', nargs='+', metavar='MARKET')
+    history = commands.add_parser('history', help="One market's archived scores")
+    history.add_argument('market', choices=list(MARKETS))
+    history.add_argument('--start')
+    history.add_argument('--end')
+    commands.add_parser('compact', help="Fold every day's part and segment files into its day file")
+    args = parser.parse_args(argv)
+    
+    archive = SnapshotArchive(args.dir)
+    pd.set_option('display.width', 200)
+    pd.set_option('display.max_columns', 40)
+    if args.command == 'list':
+        index = archive.index().drop(columns=['market_set'])
+        index['markets'] = index['markets'].str.count(re.escape(MARKET_SEPARATOR)) + 1
+        print(index.to_string(index=False) if len(index) else "Archive is empty")
+        return 0
+    if args.command == 'compact':
+        archive.compact()
+        return 0
+    if args.command == 'as-of':
+        result = archive.as_of(args.when, args.markets)
+    elif args.command == 'diff':
+        result = archive.diff(args.start, args.end, args.markets)
+        if not result.empty:
+            result = result['change'].join(result['to'][['score']].rename(columns={'score': 'score_now'}))
+    else:
+        result = archive.market_history(args.market, args.start, args.end)
+    if result.empty:
+        print("No archived snapshots match", file=sys.stderr)
+        return 1
+    print(result.to_string())
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
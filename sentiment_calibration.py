@@ -0,0 +1,215 @@
+"""Calibrate component weights and ladder thresholds against forward returns
+
+Every configuration is a set of component weights plus a scale factor per
+component that stretches or shrinks its ladder thresholds. For each
+configuration the historical indicator panel (from the backfill) is scored
+in one broadcast NumPy computation over a chunk of configurations, and the
+composite is compared with each market's forward return:
+
+    ic      Spearman correlation of score and forward return (pooled over
+            markets and dates); contrarian scores should make this negative
+    skill   -ic, so higher is better
+    spread  mean forward return after panic (<= 20) minus after euphoria (> 80)
+
+Chunks of configurations are spread across a process pool.
+
+Examples:
+    python sentiment_calibration.py --configs 10000 -o calibration.csv
+    python sentiment_calibration.py --configs 2000 --horizon 63 --workers 4
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from sentiment_core import (
+    MARKETS,
+    BACKFILL_PERIOD,
+    SCORING_TABLES,
+    SCORING_WEIGHTS,
+    backfill_risk_love_history,
+    indicator_values,
+    _COMPARISONS
+)
+
+logger = logging.getLogger(__name__)
+
+FORWARD_HORIZON = 21          # Trading days of forward return to predict
+DEFAULT_CONFIGS = 10_000
+CONFIG_CHUNK_SIZE = 128       # Configurations scored per broadcast step
+THRESHOLD_SCALE_RANGE = (0.7, 1.3)
+WEIGHT_CONCENTRATION = 20.0   # Dirichlet concentration around SCORING_WEIGHTS
+
+COMPONENTS = list(SCORING_WEIGHTS)
+
+def forward_returns(indicators, horizon=FORWARD_HORIZON):
+    """Return over the next ``horizon`` rows of each market's current_price"""
+    price = indicators['current_price']
+    future = price.groupby(level='market').shift(-horizon)
+    return future / price - 1
+
+def sample_configs(count, seed=0):
+    """Random weight/threshold-scale configurations; row 0 is the current configuration"""
+    rng = np.random.default_rng(seed)
+    base = np.array([SCORING_WEIGHTS[name] for name in COMPONENTS])
+    weights = rng.dirichlet(base * WEIGHT_CONCENTRATION, size=count)
+    scales = rng.uniform(*THRESHOLD_SCALE_RANGE, size=(count, len(COMPONENTS)))
+    weights[0], scales[0] = base, 1.0
+    columns = [f'weight_{name}' for name in COMPONENTS] + [f'scale_{name}' for name in COMPONENTS]
+    return pd.DataFrame(np.hstack([weights, scales]), columns=columns)
+
+def prepare_components(frame, tables=None):
+    """Per-component inputs for broadcast scoring
+    
+    Returns a list of (values, thresholds, choices, fixed_scores) tuples.
+    ``choices`` holds the ladder scores followed by the default, indexed by the
+    number of thresholds passed; ``fixed_scores`` is NaN except where a
+    missing-data or override rule decides the score regardless of thresholds.
+    """
+    tables = SCORING_TABLES if tables is None else tables
+    values = indicator_values(frame)
+    prepared = []
+    for name in COMPONENTS:
+        table = tables[name]
+        x = values[table['indicator']]
+        fixed = np.full(len(x), np.nan)
+        override = table.get('override')
+        if override:
+            when = np.logical_and.reduce([
+                _COMPARISONS[op](values[column], threshold) for column, op, threshold in override['when']
+            ])
+            fixed[when] = override['score']
+        if 'missing' in table:
+            missing = np.isnan(x)
+            if table.get('zero_is_missing'):
+                missing |= (x == 0)
+            fixed[missing] = table['missing']
+        
+        # Ladders are monotone (descending for '>', ascending for '<'), so the
+        # first matching rung is the number of rungs that do not match
+        sign = 1.0 if table['op'] == '>' else -1.0
+        thresholds = np.array([threshold for threshold, _ in table['ladder']], dtype=float)
+        choices = np.array([score for _, score in table['ladder']] + [table['default']], dtype=float)
+        prepared.append((sign * x, sign * thresholds, choices, fixed))
+    return prepared
+
+def score_configs(prepared, weights, scales):
+    """Composite scores, shape (rows, configs), for a chunk of configurations"""
+    # float64 throughout: half-point composites must round exactly as in score_indicator_frame
+    composite = np.zeros((len(prepared[0][0]), len(weights)))
+    for c, (x, thresholds, choices, fixed) in enumerate(prepared):
+        # (rows, configs, rungs): x fails rung k when x <= threshold_k * scale
+        fails = x[:, None, None] <= thresholds[None, None, :] * scales[None, :, c, None]
+        rung = fails.sum(axis=2)
+        rung[np.isnan(x)] = len(thresholds)    # NaN never matches, like the if/elif chain
+        component = choices[rung]
+        has_fixed = ~np.isnan(fixed)
+        component[has_fixed] = fixed[has_fixed, None]
+        composite += component * weights[None, :, c]
+    return composite
+
+def evaluate_chunk(prepared, future_returns, weights, scales):
+    """ic, skill, spread and signal count for each configuration in a chunk"""
+    composite = score_configs(prepared, weights, scales)
+    
+    score_ranks = pd.DataFrame(composite).rank().to_numpy()
+    return_ranks = pd.Series(future_returns).rank().to_numpy()
+    score_ranks = score_ranks - score_ranks.mean(axis=0)
+    centered_returns = return_ranks - return_ranks.mean()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ic = (centered_returns @ score_ranks) / (
+            np.sqrt((score_ranks ** 2).sum(axis=0)) * np.sqrt((centered_returns ** 2).sum())
+        )
+    
+    rounded = np.round(composite)
+    panic, euphoria = rounded <= 20, rounded > 80
+    with np.errstate(invalid='ignore', divide='ignore'):
+        panic_return = (future_returns[:, None] * panic).sum(axis=0) / panic.sum(axis=0)
+        euphoria_return = (future_returns[:, None] * euphoria).sum(axis=0) / euphoria.sum(axis=0)
+    return pd.DataFrame({
+        'ic': ic,
+        'skill': -ic,
+        'spread': panic_return - euphoria_return,
+        'signals': panic.sum(axis=0) + euphoria.sum(axis=0)
+    })
+
+# Per-process copies of the scoring inputs, set once by the pool initializer
+_worker_state = {}
+
+def _init_worker(prepared, future_returns):
+    _worker_state['prepared'] = prepared
+    _worker_state['future_returns'] = future_returns
+
+def _evaluate_in_worker(weights, scales):
+    return evaluate_chunk(_worker_state['prepared'], _worker_state['future_returns'], weights, scales)
+
+def calibrate(indicators, configs, horizon=FORWARD_HORIZON, workers=None, chunk_size=CONFIG_CHUNK_SIZE):
+    """Score every configuration against forward returns; returns ``configs`` with metrics, best first"""
+    future = forward_returns(indicators, horizon)
+    usable = future.notna().to_numpy()
+    frame = indicators[usable]
+    future_returns = future[usable].to_numpy(dtype=float)
+    prepared = prepare_components(frame)
+    
+    weights = configs[[f'weight_{name}' for name in COMPONENTS]].to_numpy()
+    scales = configs[[f'scale_{name}' for name in COMPONENTS]].to_numpy()
+    chunks = [(weights[i:i + chunk_size], scales[i:i + chunk_size]) for i in range(0, len(configs), chunk_size)]
+    
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = [evaluate_chunk(prepared, future_returns, w, s) for w, s in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(prepared, future_returns)) as executor:
+            results = list(executor.map(_evaluate_in_worker, *zip(*chunks)))
+    
+    metrics = pd.concat(results, ignore_index=True)
+    report = pd.concat([configs.reset_index(drop=True), metrics], axis=1)
+    report.insert(0, 'config', np.arange(len(report)))
+    return report.sort_values('skill', ascending=False).reset_index(drop=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calibrate Risk-Love weights and thresholds against forward returns.")
+    parser.add_argument('--markets', nargs='+', default=list(MARKETS), metavar='MARKET',
+                        help="Markets whose history is used (default: all)")
+    parser.add_argument('--period', default=BACKFILL_PERIOD, help=f"History to backfill (default: {BACKFILL_PERIOD})")
+    parser.add_argument('--configs', type=int, default=DEFAULT_CONFIGS,
+                        help=f"Configurations to evaluate (default: {DEFAULT_CONFIGS})")
+    parser.add_argument('--horizon', type=int, default=FORWARD_HORIZON,
+                        help=f"Forward return horizon in trading days (default: {FORWARD_HORIZON})")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: all cores)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--top', type=int, default=10, help="Configurations to print (default: 10)")
+    parser.add_argument('-o', '--output', help="Write the full report as CSV")
+    args = parser.parse_args(argv)
+    
+    unknown = [market for market in args.markets if market not in MARKETS]
+    if unknown:
+        parser.error(f"unknown market(s): {', '.join(unknown)}")
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(name)s: %(message)s')
+    
+    indicators, _, _ = backfill_risk_love_history(args.markets, period=args.period)
+    if indicators.empty:
+        logger.error("No price history available")
+        return 1
+    
+    started = time.perf_counter()
+    report = calibrate(indicators, sample_configs(args.configs, args.seed), args.horizon, args.workers)
+    logger.info("Evaluated %d configurations on %d rows in %.1fs",
+                len(report), len(indicators), time.perf_counter() - started)
+    
+    if args.output:
+        report.to_csv(args.output, index=False)
+    baseline = report[report['config'] == 0].iloc[0]
+    print(f"Current configuration: ic={baseline['ic']:.4f} spread={baseline['spread']:.4f} "
+          f"rank={report.index[report['config'] == 0][0] + 1}/{len(report)}")
+    print(report.head(args.top).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""Command-line entry point: compute Risk-Love scores without Streamlit
+
+Examples:
+    python sentiment_cli.py
+    python sentiment_cli.py --markets Global Japan "Emerging Markets" -o scores.csv
+    python sentiment_cli.py --backfill -o history.parquet
+    python sentiment_cli.py --metrics metrics.prom
+    python sentiment_cli.py --universe universes/sample.csv --rollup region
+    python sentiment_cli.py --engine registry
+"""
+import time
+
+# Start of this run, for the --timings report
+_started = time.perf_counter()
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+import pandas as pd
+
+from sentiment_core import (
+    MARKETS,
+    BACKFILL_PERIOD,
+    score_markets,
+    sentiment_frame,
+    backfill_risk_love_history,
+    startup_report
+)
+from sentiment_metrics import write_metrics
+from sentiment_registry import evaluate_registry
+from sentiment_universe import ROLLUP_LEVELS, load_universe, score_universe, rollup_scores
+
+_imports_finished = time.perf_counter()
+
+FORMATS = ('json', 'csv', 'parquet')
+ENGINES = ('components', 'registry')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compute BofA-style Risk-Love sentiment scores for a set of markets."
+    )
+    parser.add_argument(
+        '--markets', nargs='+', default=list(MARKETS), metavar='MARKET',
+        help="Markets to score (default: all). Choices: " + ", ".join(MARKETS)
+    )
+    parser.add_argument(
+        '-o', '--output',
+        help="Output file (default: stdout). The format is taken from the extension unless --format is given."
+    )
+    parser.add_argument('--format', choices=FORMATS, help="Output format (default: json)")
+    parser.add_argument(
+        '--backfill', action='store_true',
+        help=f"Write the daily score and rolling percentile history over {BACKFILL_PERIOD} instead of the latest scores"
+    )
+    parser.add_argument(
+        '--engine', choices=ENGINES, default='components',
+        help="components: the six weighted components (default); registry: every registered "
+             "indicator, combined with the INDICATOR_CATEGORIES weights"
+    )
+    parser.add_argument(
+        '--universe', metavar='CSV',
+        help="Score the constituents listed in CSV (ticker,market[,name][,region][,weight]) instead of --markets"
+    )
+    parser.add_argument(
+        '--rollup', choices=ROLLUP_LEVELS,
+        help="With --universe, write weighted scores per market or region instead of per constituent"
+    )
+    parser.add_argument('-v', '--verbose', action='store_true', help="Log progress to stderr")
+    parser.add_argument(
+        '--timings', action='store_true',
+        help="Print import, compute and total run times as JSON to stderr"
+    )
+    parser.add_argument(
+        '--metrics', metavar='FILE',
+        help="Write stage timings, cache and fallback counters to FILE (Prometheus text for .prom, else JSON)"
+    )
+    
+    args = parser.parse_args(argv)
+    unknown = [market for market in args.markets if market not in MARKETS]
+    if unknown:
+        parser.error(f"unknown market(s): {', '.join(unknown)}")
+    if args.rollup and not args.universe:
+        parser.error("--rollup needs --universe")
+    if args.engine == 'registry' and (args.universe or args.backfill):
+        parser.error("--engine registry scores the latest --markets only")
+    if args.universe and args.backfill:
+        parser.error("--universe cannot be combined with --backfill")
+    if args.format is None:
+        extension = os.path.splitext(args.output or '')[1].lstrip('.').lower()
+        args.format = extension if extension in FORMATS else 'json'
+    if args.format == 'parquet' and not args.output:
+        parser.error("parquet output needs --output")
+    return args
+
+def history_frame(scores, percentiles):
+    """Long date/market/score/percentile table from the backfill panels"""
+    long_scores = scores.rename_axis('date').reset_index().melt(
+        id_vars='date', var_name='market', value_name='score'
+    )
+    long_percentiles = percentiles.rename_axis('date').reset_index().melt(
+        id_vars='date', var_name='market', value_name='percentile'
+    )
+    history = long_scores.merge(long_percentiles, on=['date', 'market'])
+    return history.dropna(subset=['score']).sort_values(['market', 'date']).reset_index(drop=True)
+
+def write_frame(df, fmt, output=None):
+    """Write ``df`` as json/csv/parquet to ``output`` or stdout"""
+    if fmt == 'parquet':
+        df.to_parquet(output, index=False)
+        return
+    if fmt == 'csv':
+        text = df.to_csv(index=False)
+    else:
+        text = df.to_json(orient='records', indent=2, date_format='iso', force_ascii=False)
+    
+    if output:
+        with open(output, 'w') as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+        if not text.endswith('\n'):
+            sys.stdout.write('\n')
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(levelname)s %(name)s: %(message)s'
+    )
+    
+    compute_started = time.perf_counter()
+    if args.universe:
+        scores = score_universe(load_universe(args.universe))
+        df = rollup_scores(scores, by=args.rollup) if args.rollup else scores
+    elif args.engine == 'registry':
+        df = evaluate_registry(args.markets).reset_index()
+    elif args.backfill:
+        _, scores, percentiles = backfill_risk_love_history(args.markets)
+        df = history_frame(scores, percentiles) if not scores.empty else pd.DataFrame()
+    else:
+        df = sentiment_frame(score_markets(args.markets))
+    
+    compute_finished = time.perf_counter()
+    
+    write_frame(df, args.format, args.output)
+    if args.metrics:
+        write_metrics(args.metrics)
+    
+    if args.timings:
+        report = startup_report(
+            imports=_imports_finished - _started,
+            compute=compute_finished - compute_started,
+            total=time.perf_counter() - _started
+        )
+        sys.stderr.write(json.dumps(report, indent=2) + '\n')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
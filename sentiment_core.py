@@ -0,0 +1,1256 @@
+"""Data fetching, indicator and Risk-Love scoring core
+
+Everything here runs without Streamlit or matplotlib so it can be used from
+the dashboard, the command line (sentiment_cli.py) or batch jobs.
+"""
+import pandas as pd
+import numpy as np
+from datetime import datetime
+import importlib
+import logging
+import os
+import re
+import json
+import math
+import sys
+import time
+import hashlib
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+
+from sentiment_metrics import METRICS
+
+try:
+    import fcntl
+except ImportError:  # Windows: store writes are only serialized within a process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds spent importing each lazily loaded dependency (yfinance, requests,
+# bs4, matplotlib, ...) the first time a code path needed it
+IMPORT_TIMINGS = {}
+
+def lazy_import(name):
+    """Import module ``name`` on first use and record how long the import took"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    IMPORT_TIMINGS[name] = time.perf_counter() - started
+    return module
+
+def startup_report(**stages):
+    """Startup timing report: the given stage durations plus lazy import times
+    
+    Stage values are seconds, e.g. ``startup_report(imports=0.8, first_render=2.1)``.
+    """
+    return {
+        'stages': {stage: round(seconds, 4) for stage, seconds in stages.items()},
+        'lazy_imports': {name: round(seconds, 4) for name, seconds in IMPORT_TIMINGS.items()}
+    }
+
+# Market definitions
+MARKETS = {
+    'Global': {'ticker': '^GSPC', 'name': '🌍 Global', 'region': 'Global'},
+    'Japan': {'ticker': '^N225', 'name': '🇯🇵 Japan', 'region': 'Developed Asia'},
+    'Emerging Markets': {'ticker': 'EEM', 'name': '🌏 Emerging Markets', 'region': 'EM'},
+    'Asia ex-Japan': {'ticker': 'AAXJ', 'name': '🏯 Asia ex-Japan', 'region': 'Asia'},
+    'China': {'ticker': 'FXI', 'name': '🇨🇳 China', 'region': 'Asia'},
+    'India': {'ticker': 'INDA', 'name': '🇮🇳 India', 'region': 'Asia'},
+    'Taiwan': {'ticker': 'EWT', 'name': '🇹🇼 Taiwan', 'region': 'Asia'},
+    'Korea': {'ticker': 'EWY', 'name': '🇰🇷 Korea', 'region': 'Asia'},
+    'Hong Kong': {'ticker': 'EWH', 'name': '🇭🇰 Hong Kong', 'region': 'Asia'},
+    'Singapore': {'ticker': 'EWS', 'name': '🇸🇬 Singapore', 'region': 'Asia'},
+    'Indonesia': {'ticker': 'EIDO', 'name': '🇮🇩 Indonesia', 'region': 'EM Asia'},
+    'Brazil': {'ticker': 'EWZ', 'name': '🇧🇷 Brazil', 'region': 'Latin America'},
+    'Mexico': {'ticker': 'EWW', 'name': '🇲🇽 Mexico', 'region': 'Latin America'},
+    'South Africa': {'ticker': 'EZA', 'name': '🇿🇦 South Africa', 'region': 'EMEA'},
+    'Türkiye': {'ticker': 'TUR', 'name': '🇹🇷 Türkiye', 'region': 'EMEA'}
+}
+
+# BofA color scheme
+COLORS = {
+    'panic': '#006837',      # Dark Green (0-20) - Bullish Signal
+    'bearish': '#31a354',    # Medium Green (20-40) 
+    'neutral': '#fed976',    # Gold (40-60) - Neutral
+    'bullish': '#fd8d3c',    # Orange (60-80)
+    'euphoria': '#e31a1c'    # Red (80-100) - Bearish Signal
+}
+
+# BofA 35-indicator categories
+INDICATOR_CATEGORIES = {
+    'Positioning': {
+        'weight': 0.20,
+        'description': 'Fund flows, positioning, exposure levels',
+        'count': 6
+    },
+    'Put/Call Ratios': {
+        'weight': 0.25, 
+        'description': 'Options sentiment and fear gauges',
+        'count': 6
+    },
+    'Surveys': {
+        'weight': 0.30,
+        'description': 'Professional and retail sentiment surveys', 
+        'count': 7
+    },
+    'Technicals': {
+        'weight': 0.15,
+        'description': 'Technical market indicators',
+        'count': 3
+    },
+    'Volatility/Spreads': {
+        'weight': 0.10,
+        'description': 'Volatility indices, spreads, correlations',
+        'count': 13
+    }
+}
+
+# Risk-Love scoring tables. Each ladder is checked top to bottom like an
+# if/elif chain: the first (threshold, score) pair whose comparison holds wins,
+# otherwise the component gets its default score. 'missing' is the score used
+# when the indicator has no data, whether it was None or NaN. This is a
+# deliberate change from the original scalar code, which scored a NaN VIX as
+# 85 and a NaN put/call ratio as 80 (NaN fell through to the ladder default).
+# A NaN there means a failed read, not complacency. A frame cannot keep None
+# and NaN apart either: pandas stores a None put/call ratio as NaN once any
+# market has a ratio. So {'vix': nan, 'momentum_60d': 0} now scores 51, not 58.
+SCORING_TABLES = {
+    'momentum': {
+        'indicator': 'momentum_60d',
+        'op': '>',
+        'ladder': [(20, 90), (10, 75), (-5, 55), (-15, 30)],
+        'default': 10,
+        'format': '{:+g}%',
+        'labels': ["Strong bearish signal", "Bearish signal", "Neutral", "Bullish signal", "Strong bullish signal"]
+    },
+    'volatility': {
+        'indicator': 'volatility',
+        'op': '<',
+        'ladder': [(8, 85), (15, 65), (25, 50), (35, 25)],
+        'default': 10,
+        'format': '{:g}%',
+        'labels': ["Complacency (bearish)", "Low fear (bearish)", "Neutral", "High fear (bullish)", "Extreme fear (bullish)"]
+    },
+    'performance': {
+        'indicator': 'avg_perf',
+        'op': '>',
+        'ladder': [(25, 90), (10, 70), (-5, 50), (-20, 25)],
+        'default': 10,
+        'format': '{:+g}%',
+        'labels': ["Euphoria", "Strong gains", "Neutral", "Losses", "Panic"]
+    },
+    'volume': {
+        'indicator': 'volume_trend',
+        'op': '>',
+        'ladder': [(20, 65), (-20, 50)],
+        'default': 35,
+        # High volume + gains = euphoria, checked before the ladder
+        'override': {'when': [('volume_trend', '>', 50), ('perf_1m', '>', 5)], 'score': 80},
+        'format': '{:+g}%',
+        'labels': ["Rising volume", "Normal volume", "Falling volume"]
+    },
+    'put_call': {
+        'indicator': 'put_call_ratio',
+        'op': '>',
+        'ladder': [(1.0, 20), (0.8, 40), (0.6, 60)],
+        'default': 80,
+        'missing': 50,
+        'zero_is_missing': True,
+        'format': '{:.1f}',
+        'labels': ["High puts = fear (bullish)", "Mild fear (bullish)", "Mild greed (bearish)", "Low puts = greed (bearish)"]
+    },
+    'vix': {
+        'indicator': 'vix',
+        'op': '>',
+        'ladder': [(30, 15), (25, 30), (20, 50), (15, 70)],
+        'default': 85,
+        'missing': 50,
+        'format': '{:g}',
+        'labels': ["Extreme fear (bullish)", "Elevated fear (bullish)", "Neutral", "Low volatility (bearish)", "Complacency (bearish)"]
+    }
+}
+
+# Component weights of the composite score (BofA methodology weights with VIX added)
+SCORING_WEIGHTS = {
+    'momentum': 0.20,     # Reduced from 0.25
+    'volatility': 0.15,   # Reduced from 0.20
+    'performance': 0.15,  # Reduced from 0.20
+    'volume': 0.15,       # Same as before
+    'put_call': 0.15,     # Reduced from 0.20
+    'vix': 0.20           # New VIX component
+}
+
+# Value assumed for an indicator column that is absent from the data
+INDICATOR_DEFAULTS = {
+    'momentum_20d': 0,
+    'momentum_60d': 0,
+    'volatility': 15,
+    'volume_trend': 0,
+    'perf_1m': 0,
+    'perf_3m': 0,
+    'put_call_ratio': np.nan,
+    'vix': np.nan
+}
+
+_COMPARISONS = {'>': np.greater, '<': np.less}
+
+# Price history settings
+HISTORY_PERIOD = "6mo"
+VIX_TICKER = '^VIX'
+
+# Local on-disk OHLCV store (one Parquet file per ticker plus a JSON index)
+PRICE_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'ohlcv')
+PRICE_STORE_INDEX = 'index.json'
+PRICE_STORE_LOCK = '.lock'
+PRICE_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+STORE_REFRESH_SECONDS = 900   # Skip the network for tickers checked more recently than this
+
+# Network fetch settings
+FETCH_MAX_WORKERS = 8         # Concurrent requests
+FETCH_TIMEOUT = 15            # Seconds per request
+FETCH_RETRIES = 2             # Extra attempts after a failed request
+FETCH_BACKOFF = 0.5           # Seconds before the first retry, doubled after each one
+
+# Scraped pages: pooled HTTP session and on-disk conditional-GET cache
+CBOE_STATS_URL = "https://www.cboe.com/us/options/market_statistics/"
+HTTP_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'http')
+HTTP_POOL_SIZE = FETCH_MAX_WORKERS
+
+# Market-wide inputs shared by every market in a refresh
+PUT_CALL_MARKETS = ['Global', 'Japan', 'Emerging Markets']
+MACRO_TTL_SECONDS = 300
+
+# Intraday live mode: today's bars at this interval update the daily indicators
+INTRADAY_INTERVAL = "5m"
+
+# Historical backfill settings
+BACKFILL_PERIOD = "10y"
+VOLATILITY_WINDOW = 125       # Daily returns in a 6-month history, as used for the live score
+PERCENTILE_WINDOW = 756       # Rank each day's score against the trailing 3 years
+PERCENTILE_MIN_PERIODS = 252
+
+# Incremental indicator state: running sums are recomputed from the buffers
+# every this many updates so floating-point drift cannot accumulate
+STATE_RESYNC_INTERVAL = 1000
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+def get_http_session():
+    """Shared requests session with a keep-alive connection pool"""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            requests = lazy_import('requests')
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _http_session = session
+        return _http_session
+
+def _http_cache_path(url):
+    """Cache file for one URL"""
+    return os.path.join(HTTP_CACHE_DIR, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.json')
+
+def fetch_parsed(url, parse, source='http'):
+    """Fetch ``url`` with a conditional GET and return ``parse(html)``
+    
+    The ETag/Last-Modified validators and the parsed value (which must be
+    JSON serializable) are cached on disk. When the server answers 304 Not
+    Modified the cached value is returned without downloading or parsing the
+    page again. Non-200 responses return None and are not cached. Bytes and
+    cache hits are recorded in METRICS under ``source``.
+    """
+    path = _http_cache_path(url)
+    cached = None
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            cached = None
+    
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+    
+    response = fetch_with_retry(get_http_session().get, url, headers=headers, timeout=FETCH_TIMEOUT)
+    METRICS.increment('fetch_bytes_total', len(response.content), source=source)
+    METRICS.record_cache('http', hit=response.status_code == 304 and bool(cached), source=source)
+    if response.status_code == 304 and cached:
+        return cached['value']
+    if response.status_code != 200:
+        return None
+    
+    value = parse(response.text)
+    if response.headers.get('ETag') or response.headers.get('Last-Modified'):
+        os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'url': url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'fetched_at': datetime.now().isoformat(),
+                'value': value
+            }, f)
+        os.replace(tmp_path, path)
+    return value
+
+def _parse_cboe_put_call(html):
+    """Extract the total put/call ratio from the CBOE market statistics page"""
+    bs4 = lazy_import('bs4')
+    soup = bs4.BeautifulSoup(html, 'html.parser')
+    label = soup.find(string=re.compile(r'TOTAL\s+PUT\s*/\s*CALL\s+RATIO', re.I))
+    if label is None:
+        return None
+    # The ratio is the first number following the label
+    for text in label.find_all_next(string=True, limit=10):
+        match = re.search(r'\d+\.\d+', text)
+        if match:
+            return float(match.group())
+    return None
+
+def get_cboe_put_call_ratio():
+    """Get CBOE put/call ratio from CBOE website"""
+    try:
+        # Use CBOE's website data
+        with METRICS.timer('cboe'):
+            pc_ratio = fetch_parsed(CBOE_STATS_URL, _parse_cboe_put_call, source='cboe')
+        
+        if pc_ratio is None:
+            METRICS.increment('fallbacks_total', source='put_call', reason='unparsed')
+            # If we can't get live data, use simulated data based on historical ranges
+            # CBOE P/C ratio typically ranges from 0.5 (bullish) to 1.2 (bearish)
+            # We'll simulate a value between 0.5 and 1.2
+            import random
+            pc_ratio = random.uniform(0.5, 1.2)
+        
+        return pc_ratio
+    except Exception as e:
+        logger.warning(f"Could not fetch CBOE put/call ratio: {e}")
+        METRICS.increment('fallbacks_total', source='put_call', reason='error')
+        return 0.85  # Return neutral value if fetch fails
+
+def get_vix_data(panel=None):
+    """Get VIX index data from Yahoo Finance"""
+    try:
+        # Reuse the VIX close from the batched price panel when it is available
+        vix_hist = get_ticker_history(panel, VIX_TICKER)
+        if not vix_hist.empty:
+            return float(vix_hist['Close'].iloc[-1])
+        
+        # Fetch VIX data from Yahoo Finance
+        yf = lazy_import('yfinance')
+        with METRICS.timer('vix_download'):
+            vix_data = fetch_with_retry(
+                yf.download, VIX_TICKER, period='1d', progress=False, timeout=FETCH_TIMEOUT
+            )
+        if not vix_data.empty:
+            vix_value = float(vix_data['Close'].iloc[-1])  # Convert to float
+        else:
+            # If data fetch fails, use simulated data
+            METRICS.increment('fallbacks_total', source='vix', reason='empty')
+            import random
+            vix_value = random.uniform(12, 35)  # Typical VIX range
+            
+        return vix_value
+    except Exception as e:
+        logger.warning(f"Could not fetch VIX data: {e}")
+        METRICS.increment('fallbacks_total', source='vix', reason='error')
+        return 20.0  # Return neutral value as float
+
+def fetch_with_retry(fetch, *args, retries=FETCH_RETRIES, backoff=FETCH_BACKOFF, **kwargs):
+    """Call ``fetch(*args, **kwargs)``, retrying failures with exponential backoff"""
+    for attempt in range(retries + 1):
+        try:
+            return fetch(*args, **kwargs)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+def run_concurrently(jobs, max_workers=FETCH_MAX_WORKERS, timeout=None):
+    """Run a dict of name -> zero-argument callable in a bounded thread pool
+    
+    Returns ``(results, errors)`` dicts keyed by job name. A job that raises,
+    or is still running after ``timeout`` seconds, is reported in ``errors``
+    and does not hold up the caller.
+    """
+    if not jobs:
+        return {}, {}
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(jobs)))
+    futures = {executor.submit(job): name for name, job in jobs.items()}
+    done, _ = wait(futures, timeout=timeout)
+    executor.shutdown(wait=False, cancel_futures=True)
+    
+    results, errors = {}, {}
+    for future, name in futures.items():
+        if future not in done:
+            errors[name] = TimeoutError(f"{name} did not finish within {timeout}s")
+        elif future.exception() is not None:
+            errors[name] = future.exception()
+        else:
+            results[name] = future.result()
+    return results, errors
+
+def _fetch_deadline(job_count, max_workers=FETCH_MAX_WORKERS):
+    """Worst-case seconds for ``job_count`` retried requests on ``max_workers`` threads"""
+    per_job = FETCH_TIMEOUT * (FETCH_RETRIES + 1) + FETCH_BACKOFF * (2 ** FETCH_RETRIES - 1)
+    return per_job * math.ceil(job_count / max_workers)
+
+def _fetch_ticker_history(ticker, period=HISTORY_PERIOD, start=None, ticker_labels=True):
+    """Download one ticker's OHLCV history, raising if nothing comes back
+    
+    The size of the decoded history is recorded as the bytes fetched, labelled
+    with the ticker unless ``ticker_labels`` is False.
+    """
+    if start is not None:
+        window = {'start': pd.Timestamp(start).strftime('%Y-%m-%d')}
+    else:
+        window = {'period': period}
+    yf = lazy_import('yfinance')
+    label = ticker if ticker_labels else None
+    with METRICS.timer('yfinance_history', ticker=label):
+        hist = yf.Ticker(ticker).history(auto_adjust=True, timeout=FETCH_TIMEOUT, **window)
+    METRICS.increment('fetch_bytes_total', int(hist.memory_usage(deep=True).sum()), source='yfinance', ticker=label)
+    if hist.empty:
+        raise ValueError(f"no price data returned for {ticker}")
+    return hist
+
+def fetch_price_panel(tickers, period=HISTORY_PERIOD, start=None, max_workers=FETCH_MAX_WORKERS, ticker_labels=True):
+    """Download price/volume history for several tickers concurrently
+    
+    Each ticker is fetched in its own job on a bounded thread pool, with a
+    per-request timeout and retries, so the whole fetch takes about as long as
+    the slowest single ticker. ``start`` is either one date for every ticker
+    or a dict of ticker -> date (None meaning the full ``period``); a ticker
+    with a start date only requests the bars from that date onwards.
+    ``ticker_labels=False`` keeps per-ticker labels off the fetch metrics, for
+    universes too large to give every ticker its own series.
+    
+    Returns a DataFrame indexed by date with (field, ticker) MultiIndex columns,
+    aligned on the union of all trading dates. Tickers that could not be
+    fetched are left out.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return pd.DataFrame()
+    starts = start if isinstance(start, dict) else dict.fromkeys(tickers, start)
+    
+    jobs = {
+        ticker: partial(fetch_with_retry, _fetch_ticker_history, ticker,
+                        period=period, start=starts.get(ticker), ticker_labels=ticker_labels)
+        for ticker in tickers
+    }
+    results, errors = run_concurrently(
+        jobs, max_workers=max_workers, timeout=_fetch_deadline(len(jobs), max_workers)
+    )
+    if errors:
+        logger.warning(f"Could not fetch price history for {', '.join(errors)}")
+    if not results:
+        return pd.DataFrame()
+    
+    frames = {ticker: _normalize_history(results[ticker]) for ticker in tickers if ticker in results}
+    panel = pd.concat(frames, axis=1)
+    return panel.swaplevel(0, 1, axis=1).sort_index(axis=1)
+
+def get_ticker_history(panel, ticker):
+    """Extract one ticker's OHLCV history from a batched price panel"""
+    if panel is None or panel.empty or ticker not in panel.columns.get_level_values(1):
+        return pd.DataFrame()
+    hist = panel.xs(ticker, axis=1, level=1)
+    if 'Close' not in hist.columns:
+        return pd.DataFrame()
+    # Drop dates on which only other tickers traded
+    return hist.dropna(subset=['Close'])
+
+def _period_start(period):
+    """Convert a yfinance-style period such as '6mo' or '10y' to a start date"""
+    match = re.fullmatch(r'(\d+)(d|mo|y)', period)
+    if not match:
+        raise ValueError(f"Unsupported history period: {period}")
+    count, unit = int(match.group(1)), match.group(2)
+    offset = {
+        'd': pd.DateOffset(days=count),
+        'mo': pd.DateOffset(months=count),
+        'y': pd.DateOffset(years=count)
+    }[unit]
+    return pd.Timestamp.today().normalize() - offset
+
+def _store_path(ticker):
+    """Parquet file holding one ticker's stored history"""
+    safe_name = re.sub(r'[^A-Za-z0-9._-]', '_', ticker)
+    return os.path.join(PRICE_STORE_DIR, f"{safe_name}.parquet")
+
+def _load_store_index():
+    """Read the store index mapping ticker -> covered start and last stored date"""
+    path = os.path.join(PRICE_STORE_DIR, PRICE_STORE_INDEX)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_store_index(index):
+    """Atomically replace the store index"""
+    path = os.path.join(PRICE_STORE_DIR, PRICE_STORE_INDEX)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def _normalize_history(hist):
+    """Keep the OHLCV columns and use tz-naive, midnight-normalized dates"""
+    hist = hist[[field for field in PRICE_FIELDS if field in hist.columns]]
+    index = pd.DatetimeIndex(hist.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    hist = hist.set_axis(index.normalize().rename('Date'))
+    return hist[~hist.index.duplicated(keep='last')].sort_index()
+
+def read_stored_history(ticker, start=None):
+    """Read a ticker's OHLCV history from the local store"""
+    path = _store_path(ticker)
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    hist = pd.read_parquet(path)
+    if start is not None:
+        hist = hist[hist.index >= start]
+    return hist
+
+# Serializes writes to the local price store within this process; the
+# file lock in _store_file_lock does the same across processes
+_store_lock = threading.Lock()
+
+@contextmanager
+def _store_file_lock():
+    """Exclusive flock on the price store, held while the index is read, updated and saved"""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(PRICE_STORE_DIR, PRICE_STORE_LOCK), 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+def update_price_store(tickers, period=HISTORY_PERIOD, max_age=STORE_REFRESH_SECONDS, ticker_labels=True):
+    """Bring the local store up to date for the given tickers
+    
+    Tickers that are not stored yet (or whose stored history does not reach
+    back to the start of ``period``) are downloaded in full. Stored tickers
+    only request the bars from their own last stored date onwards, so the last
+    (possibly partial) bar is refreshed and new bars are appended. Tickers
+    checked within the last ``max_age`` seconds are not requested at all. If a
+    download fails the previously stored history is left in place.
+    
+    Other processes (dashboards, the scheduler) share the store, so the whole
+    update runs under a file lock and ticker files are replaced atomically;
+    a process waiting on the lock then finds the tickers freshly checked.
+    """
+    os.makedirs(PRICE_STORE_DIR, exist_ok=True)
+    with _store_lock, _store_file_lock(), METRICS.timer('store_update'):
+        index = _load_store_index()
+        window_start = _period_start(period)
+        now = time.time()
+        
+        starts = {}
+        for ticker in dict.fromkeys(tickers):
+            entry = index.get(ticker)
+            if entry is None or pd.Timestamp(entry['start']) > window_start:
+                starts[ticker] = None
+            elif now - entry.get('checked', 0) >= max_age:
+                starts[ticker] = entry['last']
+            METRICS.record_cache('price_store', hit=ticker not in starts)
+        if not starts:
+            return
+        
+        panel = fetch_price_panel(list(starts), period=period, start=starts, ticker_labels=ticker_labels)
+        
+        for ticker in starts:
+            new_bars = get_ticker_history(panel, ticker)
+            if new_bars.empty:
+                continue
+            stored = read_stored_history(ticker)
+            if not stored.empty:
+                stored = stored[stored.index < new_bars.index[0]]
+                new_bars = pd.concat([stored, new_bars])
+            path = _store_path(ticker)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            new_bars.to_parquet(tmp_path)
+            os.replace(tmp_path, path)
+            
+            entry = index.get(ticker)
+            covered_from = window_start if entry is None else min(window_start, pd.Timestamp(entry['start']))
+            index[ticker] = {
+                'start': covered_from.strftime('%Y-%m-%d'),
+                'last': new_bars.index[-1].strftime('%Y-%m-%d'),
+                'checked': now
+            }
+        
+        _save_store_index(index)
+
+def load_price_panel(tickers, period=HISTORY_PERIOD):
+    """Get a (field, ticker) price panel for ``period`` from the local store
+    
+    The store is updated first, so repeat calls only download the missing bars.
+    The panel has the same layout as ``fetch_price_panel``.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    try:
+        update_price_store(tickers, period)
+    except Exception as e:
+        logger.warning(f"Could not update local price store, using stored history: {e}")
+    
+    window_start = _period_start(period)
+    frames = {}
+    for ticker in tickers:
+        hist = read_stored_history(ticker, start=window_start)
+        if not hist.empty:
+            frames[ticker] = hist
+    if not frames:
+        return pd.DataFrame()
+    
+    panel = pd.concat(frames, axis=1)
+    return panel.swaplevel(0, 1, axis=1).sort_index(axis=1)
+
+class IndicatorState:
+    """Running window state for one ticker's indicators
+    
+    Keeps ring buffers of the last closes, returns and volumes plus their
+    running sums, so ``update`` (a new bar) and ``replace_last`` (a revised
+    last bar, e.g. an intraday tick) cost O(1). ``indicators()`` is the
+    reference definition of the indicators, with volatility taken over the
+    last VOLATILITY_WINDOW returns; ``compute_indicator_history`` and
+    ``panel_indicators`` vectorize it.
+    """
+    
+    def __init__(self, volatility_window=VOLATILITY_WINDOW):
+        self.closes = deque(maxlen=63)
+        self.volumes = deque(maxlen=20)
+        self.returns = deque(maxlen=volatility_window)
+        self.last_date = None
+        self._updates = 0
+        self._resync()
+    
+    @classmethod
+    def from_history(cls, hist, volatility_window=VOLATILITY_WINDOW):
+        """State after feeding every bar of an OHLCV history"""
+        state = cls(volatility_window)
+        hist = hist.dropna(subset=['Close'])
+        tail = hist.iloc[-(max(volatility_window, state.closes.maxlen) + 1):]
+        for date, close, volume in zip(tail.index, tail['Close'].to_numpy(), tail['Volume'].to_numpy()):
+            state.update(close, volume, date)
+        return state
+    
+    def _resync(self):
+        closes = list(self.closes)
+        self.sum20 = math.fsum(closes[-20:])
+        self.sum60 = math.fsum(closes[-60:])
+        self.volume_sum20 = math.fsum(self.volumes)
+        self.volume_sum5 = math.fsum(list(self.volumes)[-5:])
+        self.return_sum = math.fsum(self.returns)
+        self.return_sumsq = math.fsum(r * r for r in self.returns)
+        self._updates = 0
+    
+    def _push(self, buffer, value, sums):
+        """Append ``value`` and keep each (attribute, window) running sum in step"""
+        for attr, window in sums:
+            leaving = buffer[-window] if len(buffer) >= window else 0.0
+            setattr(self, attr, getattr(self, attr) + value - leaving)
+        buffer.append(value)
+    
+    def _push_return(self, value):
+        if len(self.returns) == self.returns.maxlen:
+            oldest = self.returns[0]
+            self.return_sum -= oldest
+            self.return_sumsq -= oldest * oldest
+        self.returns.append(value)
+        self.return_sum += value
+        self.return_sumsq += value * value
+    
+    def update(self, close, volume, date=None):
+        """Add a new bar"""
+        close, volume = float(close), float(volume)
+        volume = 0.0 if math.isnan(volume) else volume
+        if self.closes:
+            self._push_return(close / self.closes[-1] - 1)
+        self._push(self.closes, close, (('sum20', 20), ('sum60', 60)))
+        self._push(self.volumes, volume, (('volume_sum20', 20), ('volume_sum5', 5)))
+        self.last_date = date
+        self._updates += 1
+        if self._updates >= STATE_RESYNC_INTERVAL:
+            self._resync()
+    
+    def replace_last(self, close, volume):
+        """Revise the most recent bar in place"""
+        close, volume = float(close), float(volume)
+        volume = 0.0 if math.isnan(volume) else volume
+        close_change = close - self.closes[-1]
+        volume_change = volume - self.volumes[-1]
+        self.closes[-1] = close
+        self.volumes[-1] = volume
+        self.sum20 += close_change
+        self.sum60 += close_change
+        self.volume_sum20 += volume_change
+        self.volume_sum5 += volume_change
+        if len(self.closes) > 1:
+            old_return = self.returns[-1]
+            new_return = close / self.closes[-2] - 1
+            self.returns[-1] = new_return
+            self.return_sum += new_return - old_return
+            self.return_sumsq += new_return * new_return - old_return * old_return
+    
+    def indicators(self):
+        """Current momentum, volatility, volume trend, performance and price as a dict"""
+        count = len(self.closes)
+        current_price = self.closes[-1]
+        
+        n = len(self.returns)
+        if n > 1:
+            variance = (self.return_sumsq - self.return_sum * self.return_sum / n) / (n - 1)
+            volatility = math.sqrt(max(variance, 0.0)) * np.sqrt(252) * 100
+        else:
+            volatility = np.nan
+        
+        ma20 = self.sum20 / 20 if count >= 20 else current_price
+        ma60 = self.sum60 / 60 if count >= 60 else current_price
+        
+        avg_volume = self.volume_sum20 / 20 if len(self.volumes) >= 20 else np.nan
+        recent_volume = self.volume_sum5 / min(len(self.volumes), 5)
+        volume_trend = (recent_volume / avg_volume - 1) * 100 if avg_volume > 0 else 0
+        
+        return {
+            'momentum_20d': ((current_price / ma20) - 1) * 100,
+            'momentum_60d': ((current_price / ma60) - 1) * 100,
+            'volatility': volatility,
+            'volume_trend': volume_trend,
+            'perf_1m': ((current_price / self.closes[-21]) - 1) * 100 if count >= 21 else 0,
+            'perf_3m': ((current_price / self.closes[-63]) - 1) * 100 if count >= 63 else 0,
+            'current_price': current_price
+        }
+
+_indicator_states = {}
+_indicator_states_lock = threading.Lock()
+
+def indicator_state(ticker, hist):
+    """Cached IndicatorState for ``ticker`` brought up to date with ``hist``
+    
+    If the cached state's last bar is still in ``hist`` it is revised in place
+    and only the newer bars are added; otherwise the state is rebuilt.
+    """
+    hist = hist.dropna(subset=['Close'])
+    with _indicator_states_lock:
+        state = _indicator_states.get(ticker)
+        if state is None or state.last_date not in hist.index:
+            state = IndicatorState.from_history(hist)
+        else:
+            position = hist.index.get_loc(state.last_date)
+            last = hist.iloc[position]
+            state.replace_last(last['Close'], last['Volume'])
+            newer = hist.iloc[position + 1:]
+            for date, close, volume in zip(newer.index, newer['Close'].to_numpy(), newer['Volume'].to_numpy()):
+                state.update(close, volume, date)
+        _indicator_states[ticker] = state
+        return state
+
+def stored_indicator_state(ticker, period=HISTORY_PERIOD, cache=True):
+    """IndicatorState for a ticker in the local store, or None if it is not stored
+    
+    The stored file is only read again when it has changed since the state
+    was last brought up to date. With ``cache=False`` a fresh state is built
+    and not kept, so scoring a large universe does not hold on to one state
+    per constituent.
+    """
+    path = _store_path(ticker)
+    try:
+        modified_at = os.path.getmtime(path)
+    except OSError:
+        return None
+    if not cache:
+        hist = read_stored_history(ticker, start=_period_start(period))
+        return None if hist.empty else IndicatorState.from_history(hist)
+    with _indicator_states_lock:
+        state = _indicator_states.get(ticker)
+        if state is not None and getattr(state, 'store_modified_at', None) == modified_at:
+            METRICS.record_cache('indicator_state', hit=True)
+            return state
+    
+    METRICS.record_cache('indicator_state', hit=False)
+    hist = read_stored_history(ticker, start=_period_start(period))
+    if hist.empty:
+        return None
+    state = indicator_state(ticker, hist)
+    state.store_modified_at = modified_at
+    return state
+
+_macro_cache = {'snapshot': None, 'expires_at': 0.0}
+_macro_lock = threading.Lock()
+
+def get_macro_snapshot(panel=None, ttl=MACRO_TTL_SECONDS):
+    """Fetch the market-wide VIX and put/call inputs once per refresh
+    
+    The snapshot is cached for ``ttl`` seconds so every market scored in a
+    refresh (and any refresh inside the TTL) shares the same values. The panel
+    is only used to read VIX on a cache miss; without one, VIX is read from the
+    local price store.
+    """
+    with _macro_lock:
+        now = time.monotonic()
+        if _macro_cache['snapshot'] is not None and now < _macro_cache['expires_at']:
+            METRICS.record_cache('macro', hit=True)
+            return _macro_cache['snapshot']
+        
+        METRICS.record_cache('macro', hit=False)
+        if panel is None:
+            panel = load_price_panel([VIX_TICKER])
+        snapshot = {
+            'vix': get_vix_data(panel),
+            'put_call_ratio': get_cboe_put_call_ratio(),
+            'fetched_at': datetime.now()
+        }
+        _macro_cache['snapshot'] = snapshot
+        _macro_cache['expires_at'] = now + ttl
+        return snapshot
+
+def current_trading_date():
+    """Latest weekday as YYYY-MM-DD, used to key cached daily results"""
+    today = pd.Timestamp.today().normalize()
+    return pd.offsets.BDay().rollback(today).strftime('%Y-%m-%d')
+
+def load_ticker_indicators(ticker, period=HISTORY_PERIOD):
+    """Indicators for one ticker computed from the local store
+    
+    Raises LookupError when the ticker has no stored history.
+    """
+    state = stored_indicator_state(ticker, period)
+    if state is None:
+        raise LookupError(f"No stored price history for {ticker}")
+    with METRICS.timer('indicators', ticker=ticker):
+        return state.indicators()
+
+def add_macro_inputs(market_data, market_name, macro):
+    """Attach the shared VIX and put/call readings to one market's indicators"""
+    market_data = dict(market_data)
+    
+    # Add put/call ratio for major markets
+    if market_name in PUT_CALL_MARKETS:
+        market_data['put_call_ratio'] = macro['put_call_ratio']
+    else:
+        market_data['put_call_ratio'] = None
+        
+    # Add VIX data for all markets (global sentiment indicator)
+    market_data['vix'] = macro['vix']
+    return market_data
+
+def get_market_data(ticker, market_name, panel=None, macro=None):
+    """Get live market data
+    
+    When a price panel is supplied the indicators are computed from it;
+    otherwise (or if the ticker is missing from the panel) the ticker is fetched
+    on its own. VIX and put/call values come from the shared macro snapshot.
+    """
+    try:
+        hist = get_ticker_history(panel, ticker)
+        if hist.empty:
+            yf = lazy_import('yfinance')
+            stock = yf.Ticker(ticker)
+            with METRICS.timer('yfinance_history', ticker=ticker):
+                hist = fetch_with_retry(stock.history, period=HISTORY_PERIOD, timeout=FETCH_TIMEOUT)
+        
+        if hist.empty:
+            return None
+        
+        with METRICS.timer('indicators', ticker=ticker):
+            market_data = indicator_state(ticker, hist).indicators()
+            
+        if macro is None:
+            macro = get_macro_snapshot(panel)
+        return add_macro_inputs(market_data, market_name, macro)
+        
+    except Exception as e:
+        logger.error(f"Error fetching data for {market_name}: {str(e)}")
+        return None
+
+def indicator_frame(records):
+    """DataFrame with one row per key of ``records`` (market -> indicator dict)
+    
+    A key absent from a dict gets its INDICATOR_DEFAULTS value in that row,
+    just as a single-dict frame without the column would, so scoring the
+    frame matches ``calculate_risk_love_score`` on each dict.
+    """
+    frame = pd.DataFrame.from_dict(records, orient='index')
+    for column, default in INDICATOR_DEFAULTS.items():
+        if column in frame.columns and not pd.isna(default):
+            absent = np.array([column not in record for record in records.values()])
+            if absent.any():
+                frame[column] = frame[column].astype(object).where(~absent, default)
+    return frame
+
+def indicator_values(frame):
+    """Float arrays of every scored indicator column (plus avg_perf), with defaults for absent columns"""
+    values = {}
+    for column, default in INDICATOR_DEFAULTS.items():
+        if column in frame.columns:
+            values[column] = pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=float)
+        else:
+            values[column] = np.full(len(frame), default, dtype=float)
+    values['avg_perf'] = (values['perf_1m'] + values['perf_3m']) / 2
+    return values
+
+def score_components(frame, tables=None):
+    """Score every component of every indicator row in ``frame``
+    
+    Each ladder in the scoring tables is evaluated with np.select over whole
+    columns, which reproduces the first-match semantics of an if/elif chain
+    (NaN comparisons are False, so NaN falls through to the default just as
+    it does in plain Python). Indicators outside INDICATOR_DEFAULTS are read
+    straight from ``frame``. Returns a DataFrame with one column per component.
+    """
+    tables = SCORING_TABLES if tables is None else tables
+    values = indicator_values(frame)
+    
+    components = {}
+    for name, table in tables.items():
+        if table['indicator'] not in values:
+            values[table['indicator']] = pd.to_numeric(frame[table['indicator']], errors='coerce').to_numpy(dtype=float)
+        x = values[table['indicator']]
+        compare = _COMPARISONS[table['op']]
+        conditions = [compare(x, threshold) for threshold, _ in table['ladder']]
+        choices = [score for _, score in table['ladder']]
+        
+        override = table.get('override')
+        if override:
+            conditions.insert(0, np.logical_and.reduce([
+                _COMPARISONS[op](values[column], threshold)
+                for column, op, threshold in override['when']
+            ]))
+            choices.insert(0, override['score'])
+        
+        if 'missing' in table:
+            missing = np.isnan(x)
+            if table.get('zero_is_missing'):
+                missing |= (x == 0)
+            conditions.insert(0, missing)
+            choices.insert(0, table['missing'])
+        
+        components[name] = np.select(conditions, choices, default=table['default'])
+    
+    return pd.DataFrame(components, index=frame.index)
+
+def score_indicator_frame(frame, tables=None, weights=None):
+    """Vectorized Risk-Love score for every indicator row in ``frame``
+    
+    ``frame`` holds one row per market (or market/date) with the columns
+    returned by ``get_market_data``. Returns an integer Series of scores.
+    """
+    weights = SCORING_WEIGHTS if weights is None else weights
+    with METRICS.timer('scoring'):
+        components = score_components(frame, tables)
+        
+        # Accumulate in the same order as the original weighted sum so results
+        # match the scalar calculation bit for bit
+        composite = np.zeros(len(frame))
+        for name, weight in weights.items():
+            composite = composite + components[name].to_numpy() * weight
+    
+    scores = np.clip(np.round(composite), 0, 100).astype(int)
+    return pd.Series(scores, index=frame.index, name='score')
+
+def calculate_risk_love_score(market_data):
+    """Calculate BofA-style Risk-Love percentile score using contrarian methodology"""
+    if not market_data:
+        return 50
+    return int(score_indicator_frame(pd.DataFrame([market_data])).iloc[0])
+
+def score_market_data(market_data_by_market):
+    """Score a dict of market -> get_market_data() result in one vectorized pass
+    
+    Markets without data get the neutral score of 50.
+    """
+    rows = {market: data for market, data in market_data_by_market.items() if data}
+    scores = {market: 50 for market in market_data_by_market}
+    if rows:
+        frame = indicator_frame(rows)
+        scores.update(score_indicator_frame(frame).to_dict())
+    return scores
+
+def scoring_table_frame(component, reverse=False):
+    """Describe one component's scoring ladder as a Range/Score/Interpretation table"""
+    table = SCORING_TABLES[component]
+    fmt = table['format'].format
+    thresholds = [threshold for threshold, _ in table['ladder']]
+    above, below = ('>', '<') if table['op'] == '>' else ('<', '>')
+    
+    ranges = [f"{above} {fmt(thresholds[0])}"]
+    for first, second in zip(thresholds, thresholds[1:]):
+        low, high = sorted((first, second))
+        ranges.append(f"{fmt(low)} to {fmt(high)}")
+    ranges.append(f"{below} {fmt(thresholds[-1])}")
+    
+    df = pd.DataFrame({
+        'Range': ranges,
+        'Score': [score for _, score in table['ladder']] + [table['default']],
+        'Interpretation': table['labels']
+    })
+    if reverse:
+        df = df.iloc[::-1].reset_index(drop=True)
+    return df
+
+def compute_indicator_history(hist, vix_close=None):
+    """Daily indicator history for one ticker using vectorized rolling windows
+    
+    Row t holds the indicators ``IndicatorState.indicators`` returns after
+    the bar at t, with volatility taken over the trailing VOLATILITY_WINDOW
+    returns. No put/call history is available, so that
+    column is left empty (scored as neutral).
+    """
+    close = hist['Close']
+    volume = hist['Volume']
+    
+    # Until a full window is available the moving average falls back to the
+    # current price, exactly like the point-in-time calculation
+    ma20 = close.rolling(20).mean().fillna(close)
+    ma60 = close.rolling(60).mean().fillna(close)
+    
+    returns = close.pct_change()
+    volatility = returns.rolling(VOLATILITY_WINDOW, min_periods=2).std() * np.sqrt(252) * 100
+    
+    avg_volume = volume.rolling(20).mean()
+    recent_volume = volume.rolling(5, min_periods=1).mean()
+    volume_trend = ((recent_volume / avg_volume - 1) * 100).where(avg_volume > 0, 0)
+    
+    history = pd.DataFrame({
+        'momentum_20d': (close / ma20 - 1) * 100,
+        'momentum_60d': (close / ma60 - 1) * 100,
+        'volatility': volatility,
+        'volume_trend': volume_trend,
+        'perf_1m': ((close / close.shift(20) - 1) * 100).fillna(0),
+        'perf_3m': ((close / close.shift(62) - 1) * 100).fillna(0),
+        'current_price': close,
+        'put_call_ratio': np.nan
+    }, index=hist.index)
+    
+    if vix_close is not None and not vix_close.empty:
+        # Carry the last VIX close forward onto this market's trading dates
+        aligned = vix_close.reindex(vix_close.index.union(hist.index)).ffill()
+        history['vix'] = aligned.reindex(hist.index)
+    else:
+        history['vix'] = np.nan
+    
+    return history
+
+def rolling_percentile(score_panel, window=PERCENTILE_WINDOW, min_periods=PERCENTILE_MIN_PERIODS):
+    """Rank each day's score against the same market's trailing ``window`` scores
+    
+    ``score_panel`` has one column per market. Each column is ranked on its
+    own trading dates, so holidays in other markets do not shorten the window.
+    Returns percentiles in the 0-100 range.
+    """
+    percentiles = {}
+    for market in score_panel.columns:
+        scores = score_panel[market].dropna()
+        percentiles[market] = scores.rolling(window, min_periods=min_periods).rank(pct=True) * 100
+    return pd.DataFrame(percentiles).reindex(score_panel.index)
+
+def backfill_risk_love_history(markets=None, period=BACKFILL_PERIOD, window=PERCENTILE_WINDOW):
+    """Compute the full daily Risk-Love history for a set of markets
+    
+    Returns a tuple of (indicators, scores, percentiles). ``indicators`` is
+    indexed by (market, date); ``scores`` and ``percentiles`` are date x market.
+    Indicators are rolled over each whole series and every market/date row is
+    scored in one vectorized pass.
+    """
+    markets = list(MARKETS) if markets is None else list(markets)
+    tickers = [MARKETS[market]['ticker'] for market in markets]
+    panel = load_price_panel(tickers + [VIX_TICKER], period=period)
+    
+    vix_hist = get_ticker_history(panel, VIX_TICKER)
+    vix_close = vix_hist['Close'] if not vix_hist.empty else None
+    
+    histories = {}
+    for market, ticker in zip(markets, tickers):
+        hist = get_ticker_history(panel, ticker)
+        if not hist.empty:
+            with METRICS.timer('indicator_history', ticker=ticker):
+                histories[market] = compute_indicator_history(hist, vix_close)
+    if not histories:
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+    
+    indicators = pd.concat(histories, names=['market', 'Date'])
+    scores = score_indicator_frame(indicators).unstack('market')
+    percentiles = rolling_percentile(scores, window=window)
+    return indicators, scores, percentiles
+
+def get_sentiment_color(score):
+    """Get BofA color for sentiment score"""
+    if score <= 20:
+        return COLORS['panic']
+    elif score <= 40:
+        return COLORS['bearish']
+    elif score <= 60:
+        return COLORS['neutral']
+    elif score <= 80:
+        return COLORS['bullish']
+    else:
+        return COLORS['euphoria']
+
+def get_sentiment_interpretation(score):
+    """Get BofA interpretation and emoji"""
+    if score <= 20:
+        return "Panic (Bullish Signal)", "🟢"
+    elif score <= 40:
+        return "Bearish Sentiment", "🟡"
+    elif score <= 60:
+        return "Neutral Territory", "⚪"
+    elif score <= 80:
+        return "Bullish Sentiment", "🟠"
+    else:
+        return "Euphoria (Bearish Signal)", "🔴"
+
+def get_trading_signal(score):
+    """Get contrarian trading signal"""
+    if score <= 20:
+        return "🟢 STRONG BUY", "Panic conditions = Maximum opportunity"
+    elif score <= 40:
+        return "🟡 BUY", "Bearish sentiment = Good entry point"
+    elif score <= 60:
+        return "⚪ NEUTRAL", "Mixed signals = Wait for extremes"
+    elif score <= 80:
+        return "🟠 CAUTION", "Bullish sentiment = Reduce risk"
+    else:
+        return "🔴 STRONG SELL", "Euphoria conditions = Maximum risk"
+
+def build_sentiment_entry(score, market_data):
+    """Score, colour, interpretation and signal for one market"""
+    return {
+        'score': score,
+        'color': get_sentiment_color(score),
+        'interpretation': get_sentiment_interpretation(score),
+        'signal': get_trading_signal(score),
+        'raw_data': market_data
+    }
+
+def score_markets(markets=None, period=HISTORY_PERIOD):
+    """Fetch, compute and score a set of markets (all of MARKETS by default)
+    
+    Returns a dict of market -> sentiment entry, in the order given.
+    """
+    markets = list(MARKETS) if markets is None else list(markets)
+    tickers = [MARKETS[market]['ticker'] for market in markets]
+    panel = load_price_panel(tickers + [VIX_TICKER], period=period)
+    macro = get_macro_snapshot(panel)
+    
+    market_data_by_market = {
+        market: get_market_data(ticker, market, panel, macro)
+        for market, ticker in zip(markets, tickers)
+    }
+    scores = score_market_data(market_data_by_market)
+    return {
+        market: build_sentiment_entry(scores[market], market_data)
+        for market, market_data in market_data_by_market.items()
+    }
+
+def _fetch_session_bar(ticker, interval=INTRADAY_INTERVAL):
+    """Today's session so far as one daily bar: (date, last close, summed volume)"""
+    yf = lazy_import('yfinance')
+    with METRICS.timer('intraday_bars', ticker=ticker):
+        bars = yf.Ticker(ticker).history(period='1d', interval=interval, auto_adjust=True, timeout=FETCH_TIMEOUT)
+    bars = bars.dropna(subset=['Close'])
+    if bars.empty:
+        raise ValueError(f"no intraday data returned for {ticker}")
+    index = pd.DatetimeIndex(bars.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index[-1].normalize(), float(bars['Close'].iloc[-1]), float(bars['Volume'].fillna(0).sum())
+
+def fetch_session_bars(tickers, interval=INTRADAY_INTERVAL, max_workers=FETCH_MAX_WORKERS):
+    """Today's (date, close, volume) bar for several tickers, fetched concurrently"""
+    jobs = {
+        ticker: partial(fetch_with_retry, _fetch_session_bar, ticker, interval=interval)
+        for ticker in dict.fromkeys(tickers)
+    }
+    results, errors = run_concurrently(
+        jobs, max_workers=max_workers, timeout=_fetch_deadline(len(jobs), max_workers)
+    )
+    if errors:
+        logger.warning(f"Could not fetch intraday bars for {', '.join(errors)}")
+    return results
+
+def apply_session_bar(ticker, bar, period=HISTORY_PERIOD):
+    """Fold today's bar into the ticker's IndicatorState and return its indicators
+    
+    A bar for the state's last date revises it in place; a bar for a later
+    date is appended. Returns None if the ticker has no stored history.
+    """
+    state = stored_indicator_state(ticker, period)
+    if state is None:
+        return None
+    date, close, volume = bar
+    with _indicator_states_lock:
+        if state.last_date is not None and date == state.last_date:
+            state.replace_last(close, volume)
+        elif state.last_date is None or date > state.last_date:
+            state.update(close, volume, date)
+        return state.indicators()
+
+def score_markets_intraday(markets, interval=INTRADAY_INTERVAL, period=HISTORY_PERIOD):
+    """Score markets from today's intraday bars on top of the stored daily history
+    
+    Each poll only fetches today's bars and updates every market's indicators
+    in O(1); VIX is read from its own intraday bar and put/call from the
+    shared macro snapshot. Markets whose intraday fetch fails keep their
+    daily indicators.
+    """
+    markets = list(markets)
+    tickers = [MARKETS[market]['ticker'] for market in markets]
+    update_price_store(tickers + [VIX_TICKER], period)
+    bars = fetch_session_bars(tickers + [VIX_TICKER], interval)
+    
+    macro = dict(get_macro_snapshot())
+    if VIX_TICKER in bars:
+        macro['vix'] = bars[VIX_TICKER][1]
+    
+    market_data_by_market = {}
+    for market, ticker in zip(markets, tickers):
+        if ticker in bars:
+            indicators = apply_session_bar(ticker, bars[ticker], period)
+        else:
+            state = stored_indicator_state(ticker, period)
+            indicators = state.indicators() if state is not None else None
+        market_data_by_market[market] = add_macro_inputs(indicators, market, macro) if indicators else None
+    
+    scores = score_market_data(market_data_by_market)
+    return {
+        market: build_sentiment_entry(scores[market], market_data)
+        for market, market_data in market_data_by_market.items()
+    }
+
+def sentiment_frame(sentiment_data):
+    """Flatten sentiment entries into one row per market for export"""
+    rows = []
+    for market, data in sentiment_data.items():
+        row = {
+            'market': market,
+            'name': MARKETS[market]['name'],
+            'region': MARKETS[market]['region'],
+            'ticker': MARKETS[market]['ticker'],
+            'score': data['score'],
+            'interpretation': data['interpretation'][0],
+            'signal': data['signal'][0],
+            'signal_detail': data['signal'][1]
+        }
+        row.update(data['raw_data'] or {})
+        rows.append(row)
+    return pd.DataFrame(rows)
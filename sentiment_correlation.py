@@ -0,0 +1,202 @@
+"""Rolling cross-market correlation and return dispersion
+
+Daily returns of every ticker form a (date, ticker) matrix. Over the last
+CORRELATION_WINDOW rows ``CrossMarketState`` keeps the N x N sums needed
+for every pairwise Pearson correlation (cross products, per-pair sums and
+sums of squares, and pair counts for tickers with gaps), so a new day costs
+a few O(N^2) outer products instead of a pandas call per pair. A ticker's
+return is its move since its own previous close, and days it did not trade
+(holidays) stay empty rather than counting as a flat day, so pairs only
+count the days on which both tickers have a return.
+
+Per ticker the state yields its average correlation with the rest of the
+universe; for the universe it yields return dispersion, the mean
+cross-sectional standard deviation of daily returns, annualized in percent.
+High correlation and high dispersion both mark stress (everything moving
+together, or violently apart), so both score towards fear.
+"""
+import threading
+import warnings
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from sentiment_core import STATE_RESYNC_INTERVAL
+
+CORRELATION_WINDOW = 60        # Daily returns in the rolling window
+CORRELATION_MIN_OBS = 20       # Fewer shared days than this leave a pair's correlation empty
+
+CROSS_MARKET_TABLES = {
+    'correlation': {
+        'indicator': 'avg_correlation',
+        'op': '>',
+        'ladder': [(0.8, 15), (0.6, 30), (0.4, 50), (0.2, 70)],
+        'default': 85,
+        'missing': 50,
+        'format': '{:.2f}',
+        'labels': ["Herding (bullish)", "High correlation (bullish)", "Neutral", "Low correlation (bearish)", "Complacency (bearish)"]
+    },
+    'dispersion': {
+        'indicator': 'dispersion',
+        'op': '<',
+        'ladder': [(8, 80), (12, 65), (18, 50), (25, 30)],
+        'default': 15,
+        'missing': 50,
+        'format': '{:g}%',
+        'labels': ["Calm (bearish)", "Low dispersion (bearish)", "Neutral", "High dispersion (bullish)", "Dislocation (bullish)"]
+    }
+}
+
+def return_matrix(price_panel, tickers):
+    """Daily close-to-close returns as a (date, ticker) frame
+    
+    NaN before a ticker's history and on dates it did not trade; the first
+    return after a gap covers the whole gap.
+    """
+    if price_panel is None or price_panel.empty or 'Close' not in price_panel.columns.get_level_values(0):
+        return pd.DataFrame(columns=tickers, dtype=float)
+    closes = price_panel['Close'].reindex(columns=tickers)
+    returns = {ticker: closes[ticker].dropna().pct_change() for ticker in tickers}
+    return pd.DataFrame(returns, index=closes.index, columns=tickers).iloc[1:]
+
+class CrossMarketState:
+    """Running pairwise sums over the last ``window`` rows of a return matrix
+    
+    ``update`` (a new day) and ``replace_last`` (a revised last day) cost
+    O(N^2). The sums are rebuilt from the stored rows with matrix products
+    every STATE_RESYNC_INTERVAL updates to shed floating-point drift.
+    """
+    
+    def __init__(self, tickers, window=CORRELATION_WINDOW):
+        self.tickers = list(tickers)
+        self.window = window
+        self.rows = deque()
+        self.last_date = None
+        self._updates = 0
+        self._resync()
+    
+    @classmethod
+    def from_returns(cls, returns, window=CORRELATION_WINDOW):
+        """State over the last ``window`` rows of a (date, ticker) return frame"""
+        state = cls(returns.columns, window)
+        tail = returns.iloc[-window:]
+        state.rows.extend(tail.to_numpy(dtype=float))
+        state.last_date = tail.index[-1] if len(tail) else None
+        state._resync()
+        return state
+    
+    @staticmethod
+    def _split(row):
+        present = ~np.isnan(row)
+        return np.where(present, row, 0.0), present.astype(float)
+    
+    def _resync(self):
+        n = len(self.tickers)
+        if self.rows:
+            values = np.vstack(self.rows)
+            present = ~np.isnan(values)
+            x, m = np.where(present, values, 0.0), present.astype(float)
+            self.xx, self.xm, self.x2m, self.mm = x.T @ x, x.T @ m, (x * x).T @ m, m.T @ m
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                self.spread = deque(np.nanstd(values, axis=1, ddof=1))
+        else:
+            self.xx, self.xm, self.x2m, self.mm = (np.zeros((n, n)) for _ in range(4))
+            self.spread = deque()
+        self._updates = 0
+    
+    def _accumulate(self, row, combine):
+        """Add (np.add) or remove (np.subtract) one row's contribution in place"""
+        x, m = self._split(row)
+        combine(self.xx, np.outer(x, x), out=self.xx)
+        combine(self.xm, np.outer(x, m), out=self.xm)
+        combine(self.x2m, np.outer(x * x, m), out=self.x2m)
+        combine(self.mm, np.outer(m, m), out=self.mm)
+    
+    @staticmethod
+    def _row_spread(row):
+        present = row[~np.isnan(row)]
+        return present.std(ddof=1) if len(present) > 1 else np.nan
+    
+    def update(self, row, date=None):
+        """Add a new day of returns (one per ticker, NaN if missing)"""
+        row = np.asarray(row, dtype=float)
+        self.rows.append(row)
+        self.spread.append(self._row_spread(row))
+        self._accumulate(row, np.add)
+        if len(self.rows) > self.window:
+            self._accumulate(self.rows.popleft(), np.subtract)
+            self.spread.popleft()
+        self.last_date = date
+        self._updates += 1
+        if self._updates >= STATE_RESYNC_INTERVAL:
+            self._resync()
+    
+    def replace_last(self, row):
+        """Revise the most recent day in place"""
+        row = np.asarray(row, dtype=float)
+        self._accumulate(self.rows[-1], np.subtract)
+        self._accumulate(row, np.add)
+        self.rows[-1] = row
+        self.spread[-1] = self._row_spread(row)
+    
+    def correlation(self, min_obs=CORRELATION_MIN_OBS):
+        """N x N pairwise correlation matrix (NaN where a pair shares fewer than ``min_obs`` days)"""
+        n = self.mm
+        covariance = n * self.xx - self.xm * self.xm.T
+        variance = n * self.x2m - self.xm * self.xm
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = covariance / np.sqrt(variance * variance.T)
+        corr[(n < min_obs) | ~np.isfinite(corr)] = np.nan
+        np.fill_diagonal(corr, 1.0)
+        return np.clip(corr, -1.0, 1.0)
+    
+    def average_correlation(self, min_obs=CORRELATION_MIN_OBS):
+        """Each ticker's mean correlation with every other ticker"""
+        corr = self.correlation(min_obs)
+        np.fill_diagonal(corr, np.nan)
+        valid = ~np.isnan(corr)
+        counts = valid.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, np.where(valid, corr, 0.0).sum(axis=1) / counts, np.nan)
+    
+    def dispersion(self):
+        """Mean cross-sectional standard deviation of daily returns, annualized in percent"""
+        spread = np.array(self.spread, dtype=float)
+        if np.isnan(spread).all():
+            return np.nan
+        return float(np.nanmean(spread) * np.sqrt(252) * 100)
+
+_cross_market_states = {}
+_cross_market_lock = threading.Lock()
+
+def cross_market_state(price_panel, tickers, window=CORRELATION_WINDOW):
+    """Cached CrossMarketState for ``tickers`` brought up to date with ``price_panel``
+    
+    If the cached state's last day is still in the panel it is revised in
+    place and only the newer days are added; otherwise the state is rebuilt.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    returns = return_matrix(price_panel, tickers)
+    key = (tuple(tickers), window)
+    with _cross_market_lock:
+        state = _cross_market_states.get(key)
+        if state is None or state.last_date not in returns.index:
+            state = CrossMarketState.from_returns(returns, window)
+        else:
+            position = returns.index.get_loc(state.last_date)
+            values = returns.to_numpy(dtype=float)
+            state.replace_last(values[position])
+            for date, row in zip(returns.index[position + 1:], values[position + 1:]):
+                state.update(row, date)
+        _cross_market_states[key] = state
+        return state
+
+def cross_market_indicators(price_panel, tickers, window=CORRELATION_WINDOW):
+    """Per-ticker ``avg_correlation`` and universe ``dispersion`` as a frame indexed by ticker"""
+    state = cross_market_state(price_panel, tickers, window)
+    return pd.DataFrame({
+        'avg_correlation': state.average_correlation(),
+        'dispersion': state.dispersion()
+    }, index=pd.Index(state.tickers, name='ticker'))
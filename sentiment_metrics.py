@@ -0,0 +1,166 @@
+"""Per-stage timing and data-source health metrics
+
+A process-wide registry of stage timings (count, total, max and last
+duration) and counters (bytes fetched, cache requests/misses, fallbacks,
+stage errors), exportable as JSON or Prometheus text.
+
+Usage:
+    with METRICS.timer('cboe'):
+        ...
+    METRICS.increment('fallbacks_total', source='vix', reason='empty')
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRIC_PREFIX = 'sentiment_'
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items() if value is not None))
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(label_key):
+    if not label_key:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in label_key) + '}'
+
+class MetricsRegistry:
+    """Thread-safe store of stage timings and labelled counters"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+        self.started_at = time.time()
+    
+    def observe(self, stage, seconds, **labels):
+        """Record one ``seconds`` long run of ``stage``"""
+        key = (stage, _label_key(labels))
+        with self._lock:
+            entry = self._stages.setdefault(key, {'count': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0})
+            entry['count'] += 1
+            entry['total'] += seconds
+            entry['max'] = max(entry['max'], seconds)
+            entry['last'] = seconds
+    
+    @contextmanager
+    def timer(self, stage, **labels):
+        """Time the enclosed block as one run of ``stage``; exceptions are counted as stage errors"""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.increment('stage_errors_total', stage=stage, **labels)
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - started, **labels)
+    
+    def increment(self, name, amount=1, **labels):
+        """Add ``amount`` to counter ``name``"""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+    
+    def record_cache(self, cache, hit, **labels):
+        """Count one lookup of ``cache`` and whether it missed"""
+        self.increment('cache_requests_total', cache=cache, **labels)
+        if not hit:
+            self.increment('cache_misses_total', cache=cache, **labels)
+    
+    def value(self, name, **labels):
+        """Current value of counter ``name`` (0 if never incremented)"""
+        with self._lock:
+            return self._counters.get((name, _label_key(labels)), 0)
+    
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+            self.started_at = time.time()
+    
+    def snapshot(self):
+        """JSON-serializable copy of every stage timing and counter"""
+        with self._lock:
+            stages = [
+                {'stage': stage, 'labels': dict(label_key), 'count': entry['count'],
+                 'total_seconds': entry['total'], 'max_seconds': entry['max'], 'last_seconds': entry['last']}
+                for (stage, label_key), entry in sorted(self._stages.items())
+            ]
+            counters = [
+                {'name': name, 'labels': dict(label_key), 'value': value}
+                for (name, label_key), value in sorted(self._counters.items())
+            ]
+        return {'started_at': self.started_at, 'stages': stages, 'counters': counters}
+    
+    def to_prometheus(self):
+        """Prometheus text exposition of the current metrics"""
+        snapshot = self.snapshot()
+        lines = []
+        
+        stage_name = f'{METRIC_PREFIX}stage_seconds'
+        if snapshot['stages']:
+            lines.append(f'# HELP {stage_name} Duration of each pipeline stage.')
+            lines.append(f'# TYPE {stage_name} summary')
+            for entry in snapshot['stages']:
+                labels = _format_labels(_label_key({'stage': entry['stage'], **entry['labels']}))
+                lines.append(f"{stage_name}_count{labels} {entry['count']}")
+                lines.append(f"{stage_name}_sum{labels} {entry['total_seconds']:.6f}")
+            lines.append(f'# TYPE {stage_name}_max gauge')
+            for entry in snapshot['stages']:
+                labels = _format_labels(_label_key({'stage': entry['stage'], **entry['labels']}))
+                lines.append(f"{stage_name}_max{labels} {entry['max_seconds']:.6f}")
+        
+        counter_names = []
+        for entry in snapshot['counters']:
+            if entry['name'] not in counter_names:
+                counter_names.append(entry['name'])
+        for name in counter_names:
+            lines.append(f'# TYPE {METRIC_PREFIX}{name} counter')
+            for entry in snapshot['counters']:
+                if entry['name'] == name:
+                    lines.append(f"{METRIC_PREFIX}{name}{_format_labels(_label_key(entry['labels']))} {entry['value']}")
+        
+        lines.append(f'# TYPE {METRIC_PREFIX}metrics_started_at_seconds gauge')
+        lines.append(f"{METRIC_PREFIX}metrics_started_at_seconds {snapshot['started_at']:.3f}")
+        return '\n'.join(lines) + '\n'
+    
+    def counter_totals(self, name, by):
+        """Counter ``name`` summed per value of label ``by``"""
+        totals = {}
+        for entry in self.snapshot()['counters']:
+            if entry['name'] == name:
+                key = entry['labels'].get(by)
+                totals[key] = totals.get(key, 0) + entry['value']
+        return totals
+    
+    def stage_summary(self):
+        """One row per stage (summed over labels): runs, total, mean and max seconds"""
+        summary = {}
+        for entry in self.snapshot()['stages']:
+            row = summary.setdefault(entry['stage'], {'stage': entry['stage'], 'runs': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+            row['runs'] += entry['count']
+            row['total_seconds'] += entry['total_seconds']
+            row['max_seconds'] = max(row['max_seconds'], entry['max_seconds'])
+        for row in summary.values():
+            row['mean_seconds'] = row['total_seconds'] / row['runs']
+        return list(summary.values())
+
+# Shared by everything in the process
+METRICS = MetricsRegistry()
+
+def write_metrics(path, registry=METRICS):
+    """Atomically write ``registry`` to ``path``: Prometheus text for .prom/.txt, JSON otherwise"""
+    if os.path.splitext(path)[1].lower() in ('.prom', '.txt'):
+        text = registry.to_prometheus()
+    else:
+        text = json.dumps(registry.snapshot(), indent=2)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
@@ -0,0 +1,208 @@
+"""Shared memory-mapped price panel for multi-process deployments
+
+One writer (the snapshot refresh worker) saves the last PANEL_BARS bars of
+every ticker as float32 arrays in .npy files; every dashboard process maps
+them read-only, so the pages share one copy of the history through the OS
+page cache instead of each building pandas frames per ticker.
+
+Layout: ``values`` is (ticker, bar, field) float32 with fields PRICE_FIELDS
+and ``dates`` is (ticker, bar) int32 days since 1970-01-01. Each ticker's
+bars are right-aligned (its latest bar is in the last column) and shorter
+histories are padded in front with NaN / 0. A small JSON file names the
+current arrays, so a refresh swaps in new files atomically.
+"""
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from sentiment_core import (
+    PRICE_FIELDS,
+    VOLATILITY_WINDOW,
+    STORE_REFRESH_SECONDS,
+    HISTORY_PERIOD,
+    update_price_store,
+    read_stored_history,
+    _period_start
+)
+from sentiment_metrics import METRICS
+
+PANEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'panel')
+PANEL_META = 'panel.json'
+PANEL_BARS = VOLATILITY_WINDOW + 1     # Enough bars for every indicator
+PANEL_MAX_AGE_SECONDS = STORE_REFRESH_SECONDS
+PANEL_KEEP_VERSIONS = 2                # Older arrays are deleted once a newer pair is published
+
+CLOSE = PRICE_FIELDS.index('Close')
+VOLUME = PRICE_FIELDS.index('Volume')
+
+def panel_meta_path(directory=None):
+    return os.path.join(directory or PANEL_DIR, PANEL_META)
+
+def write_shared_panel(tickers, directory=None, period=HISTORY_PERIOD, bars=PANEL_BARS):
+    """Refresh the store for ``tickers`` and publish them as a new shared panel
+    
+    Must only be called by one process at a time (the snapshot worker holds
+    the writer lock). Returns the metadata written.
+    """
+    directory = directory or PANEL_DIR
+    tickers = list(dict.fromkeys(tickers))
+    os.makedirs(directory, exist_ok=True)
+    update_price_store(tickers, period)
+    window_start = _period_start(period)
+    
+    version = f"{time.time_ns():x}"
+    values_file, dates_file = f"values-{version}.npy", f"dates-{version}.npy"
+    with METRICS.timer('shared_panel_write'):
+        values = np.lib.format.open_memmap(
+            os.path.join(directory, values_file), mode='w+', dtype=np.float32,
+            shape=(len(tickers), bars, len(PRICE_FIELDS))
+        )
+        dates = np.lib.format.open_memmap(
+            os.path.join(directory, dates_file), mode='w+', dtype=np.int32, shape=(len(tickers), bars)
+        )
+        values[:] = np.nan
+        dates[:] = 0
+        for row, ticker in enumerate(tickers):
+            hist = read_stored_history(ticker, start=window_start).dropna(subset=['Close']).iloc[-bars:]
+            if hist.empty:
+                continue
+            values[row, bars - len(hist):] = hist[PRICE_FIELDS].to_numpy(dtype=np.float32)
+            dates[row, bars - len(hist):] = (hist.index.values.astype('datetime64[D]').astype(np.int64)).astype(np.int32)
+        values.flush()
+        dates.flush()
+        del values, dates
+    
+    meta = {
+        'version': version,
+        'generated_at': time.time(),
+        'tickers': tickers,
+        'fields': PRICE_FIELDS,
+        'bars': bars,
+        'values': values_file,
+        'dates': dates_file
+    }
+    meta_path = panel_meta_path(directory)
+    tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+    _remove_old_versions(directory, version)
+    return meta
+
+def _remove_old_versions(directory, current):
+    """Delete all but the newest PANEL_KEEP_VERSIONS array pairs (mapped files stay readable)"""
+    versions = sorted({
+        name.split('-', 1)[1][:-len('.npy')]
+        for name in os.listdir(directory)
+        if name.endswith('.npy') and '-' in name
+    }, key=lambda v: int(v, 16))
+    for version in versions[:-PANEL_KEEP_VERSIONS]:
+        if version == current:
+            continue
+        for prefix in ('values', 'dates'):
+            try:
+                os.remove(os.path.join(directory, f"{prefix}-{version}.npy"))
+            except OSError:
+                pass
+
+class SharedPanel:
+    """Read-only view of the current shared panel, remapped when a new one is published"""
+    
+    def __init__(self, directory=None):
+        self.meta_path = panel_meta_path(directory)
+        self.directory = os.path.dirname(self.meta_path)
+        self.meta = None
+        self.values = None
+        self.dates = None
+        self._rows = {}
+        self._meta_modified_at = None
+    
+    def refresh(self):
+        """Map the latest published arrays; returns False if there is no panel yet"""
+        try:
+            modified_at = os.path.getmtime(self.meta_path)
+        except OSError:
+            return False
+        if modified_at == self._meta_modified_at:
+            return True
+        try:
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+            values = np.load(os.path.join(self.directory, meta['values']), mmap_mode='r')
+            dates = np.load(os.path.join(self.directory, meta['dates']), mmap_mode='r')
+        except (OSError, ValueError, KeyError):
+            return self.meta is not None
+        self.meta, self.values, self.dates = meta, values, dates
+        self._rows = {ticker: row for row, ticker in enumerate(meta['tickers'])}
+        self._meta_modified_at = modified_at
+        return True
+    
+    def age_seconds(self):
+        return time.time() - self.meta['generated_at'] if self.meta else float('inf')
+    
+    def covers(self, tickers, max_age=PANEL_MAX_AGE_SECONDS):
+        """Whether a fresh panel holds every ticker"""
+        return (self.refresh() and self.age_seconds() <= max_age
+                and all(ticker in self._rows for ticker in tickers))
+    
+    def history(self, ticker):
+        """One ticker's bars as an OHLCV DataFrame (copied out of the mapping)"""
+        row = self._rows[ticker]
+        valid = self.dates[row] > 0
+        index = pd.DatetimeIndex(np.asarray(self.dates[row][valid]).astype('datetime64[D]'), name='Date')
+        return pd.DataFrame(np.asarray(self.values[row][valid], dtype=np.float64), index=index, columns=self.meta['fields'])
+    
+    def price_frame(self, tickers):
+        """(field, ticker) price panel in the layout of ``load_price_panel``"""
+        frames = {ticker: self.history(ticker) for ticker in tickers if ticker in self._rows}
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, axis=1).swaplevel(0, 1, axis=1).sort_index(axis=1)
+    
+    def indicators(self, tickers):
+        """Indicators for ``tickers`` computed directly on the mapped arrays"""
+        rows = [self._rows[ticker] for ticker in tickers]
+        indicators = panel_indicators(self.values[rows, :, CLOSE], self.values[rows, :, VOLUME])
+        return pd.DataFrame(indicators, index=list(tickers))
+
+def panel_indicators(close, volume):
+    """Vectorized ``IndicatorState.indicators`` over right-aligned (ticker, bar) arrays
+    
+    NaN padding in front of a row stands for bars that do not exist. Returns a
+    dict of indicator name -> array with one value per row.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.nan_to_num(np.asarray(volume, dtype=np.float64))
+    count = np.sum(~np.isnan(close), axis=1)
+    current_price = close[:, -1]
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns = close[:, 1:] / close[:, :-1] - 1
+        # Only rows with two or more returns: np.nanstd warns on the others,
+        # and np.errstate does not silence that warning
+        enough = np.sum(~np.isnan(returns), axis=1) > 1
+        volatility = np.full(len(close), np.nan)
+        volatility[enough] = np.nanstd(returns[enough], axis=1, ddof=1) * np.sqrt(252) * 100
+        
+        ma20 = np.where(count >= 20, close[:, -20:].mean(axis=1), current_price)
+        ma60 = np.where(count >= 60, close[:, -60:].mean(axis=1), current_price)
+        
+        avg_volume = np.where(count >= 20, volume[:, -20:].mean(axis=1), np.nan)
+        recent_volume = volume[:, -5:].sum(axis=1) / np.minimum(count, 5)
+        volume_trend = np.where(avg_volume > 0, (recent_volume / avg_volume - 1) * 100, 0.0)
+        
+        perf_1m = np.where(count >= 21, (current_price / close[:, -21] - 1) * 100, 0.0)
+        perf_3m = np.where(count >= 63, (current_price / close[:, -63] - 1) * 100, 0.0)
+    
+    return {
+        'momentum_20d': (current_price / ma20 - 1) * 100,
+        'momentum_60d': (current_price / ma60 - 1) * 100,
+        'volatility': volatility,
+        'volume_trend': volume_trend,
+        'perf_1m': perf_1m,
+        'perf_3m': perf_3m,
+        'current_price': current_price
+    }
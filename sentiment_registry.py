@@ -0,0 +1,235 @@
+"""Indicator registry: declared inputs, a dependency graph and category weights
+
+Inputs are shared data (price panel, VIX, put/call, ...) loaded once per
+evaluation; indicators declare which inputs they need, their category in
+INDICATOR_CATEGORIES and a scoring function returning a 0-100 score per
+market. ``evaluate_registry`` orders inputs and indicators with graphlib
+and runs every node as soon as its dependencies are done, so independent
+fetches and indicators run in parallel and no input is fetched twice.
+
+Registering an indicator:
+
+    @register_indicator('drawdown', category='Technicals', inputs=['market_indicators'])
+    def score_drawdown(markets, market_indicators):
+        return ...  # array or Series of scores, one per market (NaN = not applicable)
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from graphlib import TopologicalSorter
+
+import numpy as np
+import pandas as pd
+
+from sentiment_core import (
+    MARKETS,
+    INDICATOR_CATEGORIES,
+    SCORING_TABLES,
+    PUT_CALL_MARKETS,
+    VIX_TICKER,
+    HISTORY_PERIOD,
+    FETCH_MAX_WORKERS,
+    load_price_panel,
+    get_ticker_history,
+    indicator_state,
+    get_vix_data,
+    get_cboe_put_call_ratio,
+    score_components
+)
+from sentiment_correlation import CROSS_MARKET_TABLES, cross_market_indicators
+from sentiment_metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# name -> {'requires': [input names], 'load': callable(markets, **inputs)}
+INPUTS = {}
+# name -> {'category': str, 'inputs': [input names], 'score': callable(markets, **inputs), 'weight': float}
+INDICATORS = {}
+
+def register_input(name, requires=()):
+    """Decorator registering a shared input loader"""
+    def decorator(load):
+        INPUTS[name] = {'requires': list(requires), 'load': load}
+        return load
+    return decorator
+
+def register_indicator(name, category, inputs=(), weight=1.0):
+    """Decorator registering an indicator scoring function
+    
+    ``weight`` is the indicator's weight within its category.
+    """
+    if category not in INDICATOR_CATEGORIES:
+        raise ValueError(f"unknown indicator category: {category}")
+    def decorator(score):
+        INDICATORS[name] = {'category': category, 'inputs': list(inputs), 'score': score, 'weight': weight}
+        return score
+    return decorator
+
+# Built-in inputs
+
+@register_input('price_panel')
+def load_price_panel_input(markets, period=HISTORY_PERIOD):
+    # Every market, whatever the selection: cross_market correlates against all of them
+    tickers = [info['ticker'] for info in MARKETS.values()]
+    return load_price_panel(tickers + [VIX_TICKER], period=period)
+
+@register_input('market_indicators', requires=['price_panel'])
+def load_market_indicators(markets, price_panel):
+    rows = {}
+    for market in markets:
+        ticker = MARKETS[market]['ticker']
+        hist = get_ticker_history(price_panel, ticker)
+        if not hist.empty:
+            rows[market] = indicator_state(ticker, hist).indicators()
+    return pd.DataFrame.from_dict(rows, orient='index').reindex(markets)
+
+@register_input('vix', requires=['price_panel'])
+def load_vix(markets, price_panel):
+    return get_vix_data(price_panel)
+
+@register_input('put_call_ratio')
+def load_put_call_ratio(markets):
+    return get_cboe_put_call_ratio()
+
+@register_input('cross_market', requires=['price_panel'])
+def load_cross_market(markets, price_panel):
+    tickers = [info['ticker'] for info in MARKETS.values()]
+    indicators = cross_market_indicators(price_panel, tickers)
+    return indicators.reindex([MARKETS[market]['ticker'] for market in markets]).set_axis(markets)
+
+# Built-in indicators: the original six components, each scored with its ladder
+
+def _table_score(component, frame):
+    """Score one SCORING_TABLES component for every row of ``frame``"""
+    return score_components(frame, {component: SCORING_TABLES[component]})[component]
+
+@register_indicator('momentum', category='Technicals', inputs=['market_indicators'])
+def score_momentum(markets, market_indicators):
+    return _table_score('momentum', market_indicators).where(market_indicators['current_price'].notna())
+
+@register_indicator('performance', category='Technicals', inputs=['market_indicators'])
+def score_performance(markets, market_indicators):
+    return _table_score('performance', market_indicators).where(market_indicators['current_price'].notna())
+
+@register_indicator('volume', category='Positioning', inputs=['market_indicators'])
+def score_volume(markets, market_indicators):
+    return _table_score('volume', market_indicators).where(market_indicators['current_price'].notna())
+
+@register_indicator('volatility', category='Volatility/Spreads', inputs=['market_indicators'])
+def score_volatility(markets, market_indicators):
+    return _table_score('volatility', market_indicators).where(market_indicators['current_price'].notna())
+
+@register_indicator('vix', category='Volatility/Spreads', inputs=['vix'])
+def score_vix(markets, vix):
+    return _table_score('vix', pd.DataFrame({'vix': vix}, index=markets))
+
+@register_indicator('put_call', category='Put/Call Ratios', inputs=['put_call_ratio'])
+def score_put_call(markets, put_call_ratio):
+    scores = _table_score('put_call', pd.DataFrame({'put_call_ratio': put_call_ratio}, index=markets))
+    # Only the markets the CBOE ratio describes
+    return scores.where(scores.index.isin(PUT_CALL_MARKETS))
+
+# Cross-market indicators: only the registry composite (sentiment_cli.py
+# --engine registry) includes these; the dashboard, scheduler snapshot and
+# API score with the six SCORING_TABLES components
+
+@register_indicator('correlation', category='Volatility/Spreads', inputs=['cross_market'])
+def score_correlation(markets, cross_market):
+    return score_components(cross_market, CROSS_MARKET_TABLES)['correlation'].where(cross_market['avg_correlation'].notna())
+
+@register_indicator('dispersion', category='Volatility/Spreads', inputs=['cross_market'])
+def score_dispersion(markets, cross_market):
+    return score_components(cross_market, CROSS_MARKET_TABLES)['dispersion'].where(cross_market['dispersion'].notna())
+
+def build_graph(indicators):
+    """Dependency graph of ``('input'|'indicator', name)`` nodes for the given indicators"""
+    graph = {}
+    pending = [('input', name) for indicator in indicators for name in INDICATORS[indicator]['inputs']]
+    for indicator in indicators:
+        graph[('indicator', indicator)] = {('input', name) for name in INDICATORS[indicator]['inputs']}
+    while pending:
+        node = pending.pop()
+        if node in graph:
+            continue
+        if node[1] not in INPUTS:
+            raise KeyError(f"indicator input {node[1]!r} is not registered")
+        requires = {('input', name) for name in INPUTS[node[1]]['requires']}
+        graph[node] = requires
+        pending.extend(requires)
+    return graph
+
+def _run_node(node, markets, results):
+    kind, name = node
+    spec = INPUTS[name] if kind == 'input' else INDICATORS[name]
+    inputs = {dep: results[('input', dep)] for dep in spec['requires' if kind == 'input' else 'inputs']}
+    function = spec['load' if kind == 'input' else 'score']
+    with METRICS.timer(f'registry_{kind}', name=name):
+        return function(markets, **inputs)
+
+def evaluate_registry(markets=None, indicators=None, max_workers=FETCH_MAX_WORKERS):
+    """Evaluate registered indicators for ``markets`` (all of MARKETS by default)
+    
+    Returns a DataFrame indexed by market with one column per indicator, one
+    ``category:<name>`` column per category (weighted mean of its indicators)
+    and the composite ``score``: the category weights from
+    INDICATOR_CATEGORIES, renormalized per market over the categories that
+    have a score. Nodes whose inputs failed are logged and left out.
+    """
+    markets = list(MARKETS) if markets is None else list(markets)
+    indicators = list(INDICATORS) if indicators is None else list(indicators)
+    sorter = TopologicalSorter(build_graph(indicators))
+    sorter.prepare()
+    
+    results, failed = {}, set()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+        while sorter.is_active():
+            for node in sorter.get_ready():
+                spec = INPUTS[node[1]] if node[0] == 'input' else INDICATORS[node[1]]
+                dependencies = spec['requires'] if node[0] == 'input' else spec['inputs']
+                if any(('input', dep) in failed for dep in dependencies):
+                    failed.add(node)
+                    sorter.done(node)
+                    continue
+                running[executor.submit(_run_node, node, markets, results)] = node
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = running.pop(future)
+                try:
+                    results[node] = future.result()
+                except Exception as e:
+                    logger.warning(f"Registry {node[0]} {node[1]} failed: {e}")
+                    failed.add(node)
+                sorter.done(node)
+    
+    scores = pd.DataFrame(index=pd.Index(markets, name='market'))
+    for indicator in indicators:
+        if ('indicator', indicator) in results:
+            values = results[('indicator', indicator)]
+            scores[indicator] = pd.Series(values, index=markets) if not isinstance(values, pd.Series) else values.reindex(markets)
+    return add_category_scores(scores, indicators)
+
+def add_category_scores(scores, indicators):
+    """Append per-category and composite scores to an indicator score frame"""
+    weighted_sum = np.zeros(len(scores))
+    weight_total = np.zeros(len(scores))
+    for category, info in INDICATOR_CATEGORIES.items():
+        members = [name for name in indicators if INDICATORS[name]['category'] == category and name in scores]
+        if not members:
+            continue
+        values = scores[members].to_numpy(dtype=float)
+        weights = np.array([INDICATORS[name]['weight'] for name in members])
+        present = ~np.isnan(values)
+        member_weight = (present * weights).sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            category_score = np.where(present, values, 0.0) @ weights / member_weight
+        scores[f'category:{category}'] = category_score
+        has_score = member_weight > 0
+        weighted_sum += np.where(has_score, category_score, 0.0) * info['weight']
+        weight_total += has_score * info['weight']
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        composite = weighted_sum / weight_total
+    scores['score'] = pd.Series(np.clip(np.round(composite), 0, 100), index=scores.index).fillna(50).astype(int)
+    return scores
@@ -0,0 +1,240 @@
+"""Background refresh worker that publishes shared sentiment snapshots
+
+One worker computes a complete snapshot of every market on a schedule and
+saves it atomically; dashboard sessions only read the latest snapshot.
+
+Examples:
+    python sentiment_scheduler.py                  # refresh every 5 minutes
+    python sentiment_scheduler.py --interval 60
+    python sentiment_scheduler.py --once           # compute one snapshot and exit
+    python sentiment_scheduler.py --alert-sink webhook:http://localhost:9000/alerts --alert-sink log
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from sentiment_alerts import AlertEngine, ALERT_DIR, ALERT_LOG_FILE, alert_state_path, sink_from_spec
+from sentiment_archive import archive_snapshot
+from sentiment_core import MARKETS, VIX_TICKER, score_markets
+from sentiment_metrics import write_metrics
+from sentiment_panel import write_shared_panel
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process writer election
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'snapshots')
+SNAPSHOT_FILE = 'latest.json'
+METRICS_FILE = 'metrics.prom'
+REFRESH_INTERVAL_SECONDS = 300
+ALERT_POLL_SECONDS = 15       # How often a loop without the writer lock checks the snapshot for alerts
+
+def _json_value(value):
+    """Plain JSON value for an indicator (NaN/inf become null)"""
+    if value is None:
+        return None
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+def compute_snapshot(markets=None):
+    """Fetch and score ``markets`` (all of MARKETS by default) into a snapshot dict"""
+    started = time.perf_counter()
+    sentiment_data = score_markets(markets)
+    
+    snapshot_markets = {}
+    for market, data in sentiment_data.items():
+        raw_data = data['raw_data']
+        snapshot_markets[market] = {
+            'score': int(data['score']),
+            'color': data['color'],
+            'interpretation': list(data['interpretation']),
+            'signal': list(data['signal']),
+            'raw_data': {key: _json_value(value) for key, value in raw_data.items()} if raw_data else None
+        }
+    
+    return {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'compute_seconds': round(time.perf_counter() - started, 3),
+        'markets': snapshot_markets
+    }
+
+def snapshot_path(directory=None):
+    """Location of the latest snapshot file"""
+    return os.path.join(directory or SNAPSHOT_DIR, SNAPSHOT_FILE)
+
+def save_snapshot(snapshot, path=None):
+    """Atomically replace the latest snapshot so readers never see a partial file"""
+    path = path or snapshot_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(snapshot, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def load_snapshot(path=None):
+    """Read the latest snapshot, or None if there is none yet"""
+    path = path or snapshot_path()
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def snapshot_age_seconds(snapshot, now=None):
+    """Seconds since ``snapshot`` was generated"""
+    now = now or datetime.now(timezone.utc)
+    return (now - datetime.fromisoformat(snapshot['generated_at'])).total_seconds()
+
+def snapshot_sentiment_data(snapshot, markets=None):
+    """Convert a snapshot back to the dashboard's sentiment_data layout"""
+    sentiment_data = {}
+    for market in markets or snapshot['markets']:
+        data = snapshot['markets'].get(market)
+        if data is None:
+            continue
+        sentiment_data[market] = {
+            'score': data['score'],
+            'color': data['color'],
+            'interpretation': tuple(data['interpretation']),
+            'signal': tuple(data['signal']),
+            'raw_data': data['raw_data']
+        }
+    return sentiment_data
+
+class _WriterLock:
+    """Non-blocking cross-process lock so only one worker refreshes a snapshot file"""
+    
+    def __init__(self, path):
+        self.path = f"{path}.lock"
+        self._file = None
+    
+    def acquire(self):
+        if fcntl is None:
+            return True
+        if self._file is not None:
+            return True
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        lock_file = open(self.path, 'w')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+    
+    def release(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def run_refresh_loop(interval=REFRESH_INTERVAL_SECONDS, markets=None, path=None, stop_event=None, once=False,
+                     alert_engine=None):
+    """Compute and save a snapshot every ``interval`` seconds until ``stop_event`` is set
+    
+    When several processes run this loop on the same snapshot file, only the
+    one holding the writer lock refreshes it; the others keep retrying the
+    lock. After each refresh the snapshot is added to the as-of archive, the
+    shared memory-mapped price panel is republished for the refreshed
+    markets (all of MARKETS unless ``markets`` is given) plus VIX, and the
+    process metrics are written next to the snapshot as Prometheus text, for
+    a node_exporter textfile collector. Dashboards selecting markets outside
+    the panel compute those themselves.
+    
+    If ``alert_engine`` is given, the latest snapshot file is evaluated for
+    extreme-zone crossings on every pass, whichever process wrote it; loops
+    without the writer lock check it every ALERT_POLL_SECONDS, so alerts lag
+    a refresh by at most that long.
+    """
+    path = path or snapshot_path()
+    panel_tickers = [MARKETS[market]['ticker'] for market in (markets or MARKETS)] + [VIX_TICKER]
+    stop_event = stop_event or threading.Event()
+    writer_lock = _WriterLock(path)
+    try:
+        while not stop_event.is_set():
+            started = time.monotonic()
+            is_writer = writer_lock.acquire()
+            if is_writer:
+                try:
+                    snapshot = compute_snapshot(markets)
+                    save_snapshot(snapshot, path)
+                    archive_snapshot(snapshot_sentiment_data(snapshot), snapshot['generated_at'], source='snapshot')
+                    write_shared_panel(panel_tickers)
+                    write_metrics(os.path.join(os.path.dirname(path), METRICS_FILE))
+                    logger.info("Saved snapshot of %d markets in %.2fs",
+                                len(snapshot['markets']), snapshot['compute_seconds'])
+                except Exception:
+                    logger.exception("Snapshot refresh failed")
+            if alert_engine is not None:
+                try:
+                    snapshot = load_snapshot(path)
+                    if snapshot is not None:
+                        alert_engine.process_snapshot(snapshot)
+                except Exception:
+                    logger.exception("Alert evaluation failed")
+            if once:
+                break
+            wait = interval if is_writer or alert_engine is None else min(interval, ALERT_POLL_SECONDS)
+            stop_event.wait(max(0.0, wait - (time.monotonic() - started)))
+    finally:
+        writer_lock.release()
+
+def start_background_refresh(interval=REFRESH_INTERVAL_SECONDS, markets=None, path=None, alert_engine=None):
+    """Run the refresh loop in a daemon thread; returns (thread, stop_event)"""
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=run_refresh_loop,
+        kwargs={'interval': interval, 'markets': markets, 'path': path, 'stop_event': stop_event,
+                'alert_engine': alert_engine},
+        name='sentiment-snapshot-refresh',
+        daemon=True
+    )
+    thread.start()
+    return thread, stop_event
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh the shared Risk-Love sentiment snapshot on a schedule.")
+    parser.add_argument('--interval', type=float, default=REFRESH_INTERVAL_SECONDS,
+                        help=f"Seconds between refreshes (default: {REFRESH_INTERVAL_SECONDS})")
+    parser.add_argument('--markets', nargs='+', default=list(MARKETS), metavar='MARKET',
+                        help="Markets to include (default: all)")
+    parser.add_argument('--path', default=snapshot_path(), help="Snapshot file to write")
+    parser.add_argument('--once', action='store_true', help="Compute a single snapshot and exit")
+    parser.add_argument('--alert-sink', action='append', metavar='SPEC',
+                        help="Alert sink: file:PATH, webhook:URL or log; repeatable "
+                             f"(default: file:{os.path.join(ALERT_DIR, ALERT_LOG_FILE)})")
+    parser.add_argument('--no-alerts', action='store_true', help="Do not evaluate extreme-signal alerts")
+    args = parser.parse_args(argv)
+    
+    unknown = [market for market in args.markets if market not in MARKETS]
+    if unknown:
+        parser.error(f"unknown market(s): {', '.join(unknown)}")
+    
+    alert_engine = None
+    if not args.no_alerts:
+        try:
+            sinks = [sink_from_spec(spec) for spec in args.alert_sink] if args.alert_sink else None
+        except ValueError as e:
+            parser.error(str(e))
+        alert_engine = AlertEngine(sinks, state_path=alert_state_path(args.alert_sink))
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    try:
+        run_refresh_loop(args.interval, args.markets, args.path, once=args.once, alert_engine=alert_engine)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
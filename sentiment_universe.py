@@ -0,0 +1,140 @@
+"""Constituent universes: load, score in chunks and roll up to markets/regions
+
+A universe is a CSV with one row per constituent:
+
+    ticker,market[,name][,region][,weight]
+
+``market`` is a MARKETS key (it sets the put/call inputs and, unless given,
+the region). Constituents are fetched and scored UNIVERSE_CHUNK_SIZE at a
+time, so only one chunk of price history is in memory at once: indicator
+states are built per chunk and not cached, and fetch metrics carry no
+per-ticker labels. The roll-up is a single grouped aggregation.
+
+Example:
+    python sentiment_cli.py --universe universes/sample.csv --rollup region
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from sentiment_core import (
+    MARKETS,
+    HISTORY_PERIOD,
+    PUT_CALL_MARKETS,
+    update_price_store,
+    stored_indicator_state,
+    get_macro_snapshot,
+    score_indicator_frame
+)
+from sentiment_metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+UNIVERSE_CHUNK_SIZE = 200
+UNIVERSE_COLUMNS = ['ticker', 'market', 'name', 'region', 'weight']
+ROLLUP_LEVELS = ('market', 'region')
+
+def load_universe(path):
+    """Read a universe CSV into a ticker/market/name/region/weight frame
+    
+    Raises ValueError if the ticker or market column is missing, a market
+    without an explicit region is not in MARKETS or a weight is negative.
+    Duplicate tickers keep their first row; missing weights default to 1.
+    """
+    universe = pd.read_csv(path, dtype={'ticker': str, 'market': str})
+    missing = {'ticker', 'market'} - set(universe.columns)
+    if missing:
+        raise ValueError(f"universe {path} is missing column(s): {', '.join(sorted(missing))}")
+    
+    universe['ticker'] = universe['ticker'].str.strip()
+    universe = universe.dropna(subset=['ticker']).drop_duplicates('ticker').reset_index(drop=True)
+    market_regions = universe['market'].map(lambda market: MARKETS.get(market, {}).get('region'))
+    if 'region' in universe.columns:
+        universe['region'] = universe['region'].fillna(market_regions)
+    else:
+        universe['region'] = market_regions
+    unknown = universe.loc[universe['region'].isna(), 'market'].unique()
+    if len(unknown):
+        raise ValueError(f"unknown market(s) without a region: {', '.join(map(str, unknown))}")
+    
+    if 'name' not in universe.columns:
+        universe['name'] = universe['ticker']
+    universe['name'] = universe['name'].fillna(universe['ticker'])
+    if 'weight' not in universe.columns:
+        universe['weight'] = 1.0
+    universe['weight'] = pd.to_numeric(universe['weight'], errors='coerce').fillna(1.0)
+    if (universe['weight'] < 0).any():
+        raise ValueError(f"universe {path} has negative weights")
+    return universe[UNIVERSE_COLUMNS]
+
+def _score_chunk(chunk, macro, period):
+    """Fetch, compute and score one chunk of constituents"""
+    try:
+        update_price_store(chunk['ticker'].tolist(), period, ticker_labels=False)
+    except Exception as e:
+        logger.warning(f"Could not update local price store, scoring the chunk from stored history: {e}")
+    
+    rows = {}
+    for ticker in chunk['ticker']:
+        state = stored_indicator_state(ticker, period, cache=False)
+        if state is not None:
+            rows[ticker] = state.indicators()
+    if not rows:
+        return pd.DataFrame()
+    
+    frame = chunk.set_index('ticker').join(pd.DataFrame.from_dict(rows, orient='index'), how='inner')
+    frame['put_call_ratio'] = np.where(frame['market'].isin(PUT_CALL_MARKETS), macro['put_call_ratio'], np.nan)
+    frame['vix'] = macro['vix']
+    frame['score'] = score_indicator_frame(frame)
+    return frame.reset_index()
+
+def score_universe(universe, chunk_size=UNIVERSE_CHUNK_SIZE, period=HISTORY_PERIOD):
+    """Score every constituent of ``universe``, ``chunk_size`` tickers at a time
+    
+    Returns one row per constituent with its indicators and score.
+    Constituents without price history are left out (and logged).
+    """
+    macro = get_macro_snapshot()
+    results = []
+    for start in range(0, len(universe), chunk_size):
+        chunk = universe.iloc[start:start + chunk_size]
+        with METRICS.timer('universe_chunk'):
+            results.append(_score_chunk(chunk, macro, period))
+    
+    scores = pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+    if len(scores) < len(universe):
+        logger.warning(f"No price history for {len(universe) - len(scores)} of {len(universe)} constituents")
+    return scores
+
+def rollup_scores(scores, by='market'):
+    """Weighted sentiment per market or region from constituent scores
+    
+    Returns the weighted mean score, constituent count, score dispersion and
+    the weighted share of constituents in panic (<= 20) and euphoria (> 80).
+    """
+    if by not in ROLLUP_LEVELS:
+        raise ValueError(f"by must be one of {', '.join(ROLLUP_LEVELS)}")
+    if scores.empty:
+        return pd.DataFrame()
+    
+    weight = scores['weight']
+    frame = pd.DataFrame({
+        by: scores[by],
+        'weight': weight,
+        'weighted_score': scores['score'] * weight,
+        'panic_weight': weight.where(scores['score'] <= 20, 0.0),
+        'euphoria_weight': weight.where(scores['score'] > 80, 0.0),
+        'score': scores['score']
+    })
+    grouped = frame.groupby(by, sort=False)
+    sums = grouped[['weight', 'weighted_score', 'panic_weight', 'euphoria_weight']].sum()
+    
+    rollup = pd.DataFrame({
+        'score': (sums['weighted_score'] / sums['weight']).round().astype('Int64'),
+        'constituents': grouped.size(),
+        'dispersion': grouped['score'].std(),
+        'panic_share': sums['panic_weight'] / sums['weight'],
+        'euphoria_share': sums['euphoria_weight'] / sums['weight']
+    })
+    return rollup.reset_index()
@@ -0,0 +1,41 @@
+import pandas as pd
+
+from sentiment_archive import SnapshotArchive
+from sentiment_core import build_sentiment_entry
+
+def snapshot(scores):
+    return {market: build_sentiment_entry(score, {'momentum_20d': 1.0, 'vix': 18.0, 'current_price': 100.0})
+            for market, score in scores.items()}
+
+def test_partial_snapshot_does_not_hide_earlier_full_snapshot(tmp_path):
+    archive = SnapshotArchive(str(tmp_path))
+    assert archive.append(snapshot({'Global': 40, 'Japan': 55, 'China': 60}), '2026-10-01 10:00', source='scheduler')
+    assert archive.append(snapshot({'China': 70}), '2026-10-01 10:01', source='live')
+    
+    result = archive.as_of('2026-10-01 10:05', ['Global', 'Japan'])
+    assert list(result.index) == ['Global', 'Japan']
+    assert list(result['score']) == [40, 55]
+    
+    result = archive.as_of('2026-10-01 10:05')
+    assert result.loc['China', 'score'] == 70
+    assert result.loc['China', 'source'] == 'live'
+    assert result.loc['Japan', 'generated_at'] == pd.Timestamp('2026-10-01 10:00', tz='UTC')
+    
+    changes = archive.diff('2026-10-01 10:00', '2026-10-01 10:05')
+    assert sorted(changes.index) == ['China', 'Global', 'Japan']
+    assert changes.loc['China', ('change', 'score')] == 10
+    assert changes.loc['Global', ('change', 'score')] == 0
+
+def test_as_of_before_first_snapshot_is_empty(tmp_path):
+    archive = SnapshotArchive(str(tmp_path))
+    archive.append(snapshot({'Global': 40}), '2026-10-01 10:00')
+    assert archive.as_of('2026-10-01 09:59').empty
+
+def test_only_unchanged_repeats_are_skipped(tmp_path):
+    archive = SnapshotArchive(str(tmp_path))
+    assert archive.append(snapshot({'Global': 40}), '2026-10-01 10:00')
+    assert not archive.append(snapshot({'Global': 40}), '2026-10-01 10:01')
+    assert archive.append(snapshot({'Global': 45}), '2026-10-01 10:02')
+    assert archive.append(snapshot({'Global': 40}), '2026-10-01 10:03')
+    assert archive.append(snapshot({'Global': 40}), '2026-10-01 10:04', source='scheduler')
+    assert list(archive.market_history('Global')['score']) == [40, 45, 40, 40]
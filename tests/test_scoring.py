@@ -0,0 +1,14 @@
+import numpy as np
+
+from sentiment_core import calculate_risk_love_score, score_market_data
+
+def test_mixed_keys_match_single_market_scores():
+    market_data = {
+        'A': {'momentum_60d': 5, 'volatility': 30},
+        'B': {'momentum_60d': 5},
+        'C': {'perf_1m': 8, 'perf_3m': 12, 'vix': 32.0, 'put_call_ratio': 1.1},
+        'D': {'momentum_20d': -3, 'vix': np.nan}
+    }
+    assert score_market_data(market_data) == {
+        market: calculate_risk_love_score(data) for market, data in market_data.items()
+    }